@@ -5,14 +5,23 @@ https://github.com/jmcruvellier/little_monkey
 """
 from __future__ import annotations
 
+from datetime import timedelta
+from functools import partial
+import shutil
+
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant
 from homeassistant.const import CONF_PASSWORD, CONF_USERNAME
 from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from homeassistant.helpers.event import async_track_time_interval
 
-from .api import LittleMonkeyApiClient
+from .api import LittleMonkeyApiClient, get_account
+from .backfill import LittleMonkeyBackfill
 from .const import (
+    CONF_BACKFILL_INTERVAL,
+    CONF_BASE_URL,
     DOMAIN,
+    ECOJOKO_BASE_URL,
     PLATFORMS,
     POLL_INTERVAL,
     CONF_USE_HCHP_FEATURE,
@@ -20,7 +29,9 @@ from .const import (
     CONF_USE_TEMPHUM_FEATURE,
     CONF_USE_PROD_FEATURE
 )
-from .coordinator import LittleMonkeyDataUpdateCoordinator
+from .coordinator import LittleMonkeyDataUpdateCoordinator, samples_directory
+from .services import async_setup_services, async_unload_services
+from .store import account_key, async_get_store
 
 
 def get_boolean(array, index):
@@ -42,30 +53,69 @@ def get_string(array, index):
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Set up this integration using UI."""
     hass.data.setdefault(DOMAIN, {})
+    store = await async_get_store(hass)
+    # Entries of a same user share one session
+    account = get_account(
+        username=get_string(entry.data, CONF_USERNAME),
+        password=get_string(entry.data, CONF_PASSWORD),
+        session=async_get_clientsession(hass),
+        store=store,
+        base_url=entry.data.get(CONF_BASE_URL, ECOJOKO_BASE_URL),
+    )
+    client = LittleMonkeyApiClient(
+        username=get_string(entry.data, CONF_USERNAME),
+        password=get_string(entry.data, CONF_PASSWORD),
+        poll_interval=get_int(entry.data, POLL_INTERVAL),
+        use_hchp=get_boolean(entry.data, CONF_USE_HCHP_FEATURE),
+        use_tempo=get_boolean(entry.data, CONF_USE_TEMPO_FEATURE),
+        use_temphum=get_boolean(entry.data, CONF_USE_TEMPHUM_FEATURE),
+        use_prod=get_boolean(entry.data, CONF_USE_PROD_FEATURE),
+        session=async_get_clientsession(hass),
+        account=account,
+    )
+    entry.async_on_unload(client.close)
     coordinator = LittleMonkeyDataUpdateCoordinator(
         hass=hass,
         entry=entry,
-        client=LittleMonkeyApiClient(
-            username=get_string(entry.data, CONF_USERNAME),
-            password=get_string(entry.data, CONF_PASSWORD),
-            poll_interval=get_int(entry.data, POLL_INTERVAL),
-            use_hchp=get_boolean(entry.data, CONF_USE_HCHP_FEATURE),
-            use_tempo=get_boolean(entry.data, CONF_USE_TEMPO_FEATURE),
-            use_temphum=get_boolean(entry.data, CONF_USE_TEMPHUM_FEATURE),
-            use_prod=get_boolean(entry.data, CONF_USE_PROD_FEATURE),
-            session=async_get_clientsession(hass),
-        ),
+        client=client,
+        store=store,
     )
     # 93 bug fix
     await coordinator.async_initialize()
-    # https://developers.home-assistant.io/docs/integration_fetching_data#coordinated-single-api-poll-for-data-for-all-entities
-    await coordinator.async_config_entry_first_refresh()
+    # Entities start from the last good snapshot, refreshed in background
+    restored = coordinator.async_restore()
+    if not restored:
+        # https://developers.home-assistant.io/docs/integration_fetching_data#coordinated-single-api-poll-for-data-for-all-entities
+        await coordinator.async_config_entry_first_refresh()
+        # Statistics have their own coordinator, their failure leaves
+        # their sensors unavailable without failing the entry
+        await coordinator.statistics.async_refresh()
+    # One ring of realtime samples per power meter
+    if coordinator.samples is not None:
+        await coordinator.samples.async_open(client.power_meter_ids)
+        entry.async_on_unload(coordinator.samples.async_close)
 
     entry.async_on_unload(entry.add_update_listener(async_reload_entry))
 
     hass.data[DOMAIN][entry.entry_id] = coordinator
 
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
+    async_setup_services(hass)
+    if restored:
+        entry.async_create_background_task(
+            hass, coordinator.async_revalidate(), f"{DOMAIN} revalidation")
+
+    # Closed days imported as long-term statistics, in background
+    backfill = LittleMonkeyBackfill(
+        hass=hass,
+        entry=entry,
+        client=client,
+        store=store,
+        names=coordinator.tranfile,
+    )
+    entry.async_on_unload(async_track_time_interval(
+        hass, backfill.async_schedule, timedelta(seconds=CONF_BACKFILL_INTERVAL)))
+    backfill.async_schedule()
 
     return True
 
@@ -74,9 +124,21 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Handle removal of an entry."""
     if unloaded := await hass.config_entries.async_unload_platforms(entry, PLATFORMS):
         hass.data[DOMAIN].pop(entry.entry_id)
+        async_unload_services(hass)
     return unloaded
 
 
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Delete the snapshot and the realtime samples of a removed entry."""
+    store = await async_get_store(hass)
+    store.clear_snapshot(account_key(
+        get_string(entry.data, CONF_USERNAME),
+        entry.data.get(CONF_BASE_URL, ECOJOKO_BASE_URL),
+    ), entry.entry_id)
+    await hass.async_add_executor_job(
+        partial(shutil.rmtree, samples_directory(hass, entry), ignore_errors=True))
+
+
 async def async_reload_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
     """Reload config entry."""
     await hass.config_entries.async_reload(entry.entry_id)
@@ -3,27 +3,67 @@ from __future__ import annotations
 
 # import traceback
 
-from enum import Enum
-from datetime import datetime, timedelta
+from collections import deque
+from functools import partial
 import asyncio
+import hashlib
 import json
 import socket
+import time
+from typing import TYPE_CHECKING
 import aiohttp
 import async_timeout
 from .const import (
     CONF_API_TIMEOUT,
-    CONF_API_STAT_REFRESH,
-    ECOJOKO_LOGIN_URL,
-    ECOJOKO_GATEWAYS_URL,
-    ECOJOKO_GATEWAY_URL,
+    CONF_API_TIMEOUT_FLOOR,
+    CONF_API_TIMEOUT_CEILING,
+    CONF_API_TIMEOUT_MARGIN,
+    CONF_API_TIMEOUT_MIN_SAMPLES,
+    CONF_API_POWERSTAT_REFRESH,
+    CONF_API_TEMPSTAT_REFRESH,
+    CONF_API_HUMSTAT_REFRESH,
+    CONF_API_SESSION_MAX_AGE,
+    CONF_API_TOPOLOGY_MAX_AGE,
+    CONF_API_MAX_CONCURRENCY,
+    CONF_USE_HCHP_FEATURE,
+    CONF_USE_TEMPO_FEATURE,
+    CONF_API_RETRIES,
+    CONF_API_BACKOFF_BASE,
+    CONF_API_BACKOFF_MAX,
+    CONF_API_BREAKER_THRESHOLD,
+    CONF_API_BREAKER_COOLDOWN,
+    CONF_API_BREAKER_MAX_COOLDOWN,
+    CONF_API_INLINE_DECODE_MAX,
+    CONF_API_LOOP_BLOCK_WINDOW,
+    CONF_ESTIMATE_MAX_GAP,
+    ECOJOKO_BASE_URL,
     LOGGER
 )
+from .breaker import BreakerState, CircuitBreaker
+from .closed_days import ClosedDaysCache
+from .integrator import EnergyIntegrator
+from .metrics import ApiMetrics
+from .models import DeviceReading, Snapshot
+from .scheduler import StatScheduler
+from .decoders import (
+    PayloadError,
+    PowerstatEntry,
+    decode_gateways,
+    decode_login,
+    decode_powerstat,
+    decode_realtime_conso,
+    decode_stat,
+)
+from .store import account_key
+from .tariffs import TARIFF_OPTIONS, index_subconsumption
 from .utils import (
     get_current_date,
-    get_current_time,
     get_paris_timezone,
-    get_value_from_json_array,
-    convert_to_float)
+    get_cookies_expiry,
+    get_backoff_delay)
+
+if TYPE_CHECKING:
+    from .store import LittleMonkeyStore
 
 TZ = get_paris_timezone()
 
@@ -44,145 +84,187 @@ class LittleMonkeyApiClientAuthenticationError(
     """Exception to indicate an authentication error."""
 
 
-class APIStatus(Enum):
-    """API status enum."""
+class LittleMonkeyApiClientUnavailableError(
+    LittleMonkeyApiClientCommunicationError
+):
+    """Exception to indicate a call not made while its circuit breaker is open."""
 
-    INIT = 0
-    RUN = 1
 
+def _call_failed(result) -> bool | None:
+    """Return whether a call failed, None if its circuit breaker did not let it through."""
+    if isinstance(result, LittleMonkeyApiClientUnavailableError):
+        return None
+    # The service answered
+    if isinstance(result, LittleMonkeyApiClientAuthenticationError):
+        return False
+    return isinstance(result, BaseException)
+
+
+# Process-wide accounts shared by the config entries of a same user
+_ACCOUNTS: dict[tuple[str, str], LittleMonkeyApiAccount] = {}
 
-class LittleMonkeyApiClient:
-    """API Client to retrieve ecojoko data."""
+
+def get_account(
+    username: str,
+    password: str,
+    session: aiohttp.ClientSession,
+    store: LittleMonkeyStore | None = None,
+    base_url: str = ECOJOKO_BASE_URL,
+) -> LittleMonkeyApiAccount:
+    """Return the shared account of a user, creating it if needed."""
+    base_url = base_url.rstrip("/")
+    account = _ACCOUNTS.get((username, base_url))
+    if account is None:
+        account = _ACCOUNTS[(username, base_url)] = LittleMonkeyApiAccount(
+            username=username,
+            password=password,
+            session=session,
+            store=store,
+            base_url=base_url,
+        )
+    else:
+        account.update_password(password)
+    account.acquire()
+    return account
+
+
+def _topology_changes(previous: list[dict], current: list[dict]) -> set[str]:
+    """Return what changed between two gateway topologies."""
+    changes = set()
+    if [(gateway["gateway_id"], gateway["power_meter_ids"], gateway["temp_hum_ids"])
+            for gateway in previous] != \
+            [(gateway["gateway_id"], gateway["power_meter_ids"], gateway["temp_hum_ids"])
+             for gateway in current]:
+        changes.add("devices")
+    if [gateway["gateway_firmware_version"] for gateway in previous] != \
+            [gateway["gateway_firmware_version"] for gateway in current]:
+        changes.add("gateway_firmware_version")
+    return changes
+
+
+class LittleMonkeyApiAccount:
+    """Ecojoko session and gateways of an account, shared by its clients."""
 
     def __init__(
         self,
         username: str,
         password: str,
-        poll_interval: int,
-        use_hchp: bool,
-        use_tempo: bool,
-        use_temphum: bool,
-        use_prod: bool,
         session: aiohttp.ClientSession,
+        store: LittleMonkeyStore | None = None,
+        max_concurrency: int = CONF_API_MAX_CONCURRENCY,
+        timeout_bounds: tuple[float, float] = (
+            CONF_API_TIMEOUT_FLOOR, CONF_API_TIMEOUT_CEILING),
+        base_url: str = ECOJOKO_BASE_URL,
     ) -> None:
         """Initialize."""
         self._username = username
+        # Ecojoko service, or a local stub
+        self._base_url = base_url.rstrip("/")
+        self._store_key = account_key(username, self._base_url)
         self._password = password
-        self._poll_interval = poll_interval
-        self._use_hchp = use_hchp
-        self._use_tempo = use_tempo
-        self._use_temphum = use_temphum
-        self._use_prod = use_prod
         self._session = session
+        self._store = store
         self._headers = {"Content-type": "application/json"}
         self._cookies = None
-        self._gateway_id = None
-        self._power_meter_id = None
-        self._temp_hum_id = None
-        """Properties."""
-        self._gateway_firmware_version = None
-        self._realtime_conso = None
-        self._kwh = None
-        self._kwh_hc_ns = None
-        self._kwh_hp_ns = None
-        self._tempo_hc_blue = None
-        self._tempo_hp_blue = None
-        self._tempo_hc_white = None
-        self._tempo_hp_white = None
-        self._tempo_hc_red = None
-        self._tempo_hp_red = None
-        self._kwh_prod = None
-        self._indoor_temp = None
-        self._outdoor_temp = None
-        self._indoor_hum = None
-        self._outdoor_hum = None
-
-        """Internal."""
-        # 67 fix
-        self._status = APIStatus.INIT
-        self._last_powerstat_refresh = None
-        self._last_tempstat_refresh = None
-        self._last_humstat_refresh = None
+        self._gateways = []
+        self._topology_checked = None
+        # Bounds the concurrent calls to the service
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._in_flight: dict[str, asyncio.Future] = {}
+        # Last payload of each endpoint, for conditional requests
+        self._payloads: dict[tuple[str, str], tuple] = {}
+        # Circuit breaker of each endpoint
+        self._breakers: dict[str, CircuitBreaker] = {}
+        # Latency, size and error statistics of each endpoint
+        self._metrics = ApiMetrics()
+        # Timeouts follow the latency of each endpoint
+        self._timeout_bounds = timeout_bounds
+        self._users = 0
 
     @property
-    def gateway_firmware_version(self) -> str:
-        """Return the firmware version."""
-        return self._gateway_firmware_version
+    def gateways(self) -> list[dict]:
+        """Return the gateways of the account."""
+        return self._gateways
 
     @property
-    def realtime_conso(self) -> int:
-        """Return the realtime consumption."""
-        return self._realtime_conso
+    def base_url(self) -> str:
+        """Return the URL of the Ecojoko service."""
+        return self._base_url
 
     @property
-    def kwh(self) -> int:
-        """Return the grid consumption."""
-        return self._kwh
+    def store_key(self) -> str:
+        """Return the key of the account in the persistent cache."""
+        return self._store_key
 
     @property
-    def kwh_hc_ns(self) -> int:
-        """Return the HC consumption."""
-        return self._kwh_hc_ns
+    def topology_expired(self) -> bool:
+        """Return True if the gateway topology should be rediscovered."""
+        return self._topology_checked is None or \
+            time.time() - self._topology_checked > CONF_API_TOPOLOGY_MAX_AGE
 
-    @property
-    def kwh_hp_ns(self) -> int:
-        """Return the HP consumption."""
-        return self._kwh_hp_ns
+    def acquire(self) -> None:
+        """Register a client using the account."""
+        self._users += 1
 
-    @property
-    def tempo_hc_blue(self) -> int:
-        """Return the Blue HC consumption."""
-        return self._tempo_hc_blue
-
-    @property
-    def tempo_hp_blue(self) -> int:
-        """Return the Blue HP consumption."""
-        return self._tempo_hp_blue
+    def release(self) -> None:
+        """Unregister a client, forgetting the account once unused."""
+        self._users -= 1
+        key = (self._username, self._base_url)
+        if self._users <= 0 and _ACCOUNTS.get(key) is self:
+            del _ACCOUNTS[key]
 
-    @property
-    def tempo_hc_white(self) -> int:
-        """Return the White HC consumption."""
-        return self._tempo_hc_white
-
-    @property
-    def tempo_hp_white(self) -> int:
-        """Return the White HP consumption."""
-        return self._tempo_hp_white
+    def update_password(self, password: str) -> None:
+        """Use new credentials for the next login."""
+        if password != self._password:
+            self._password = password
+            self._cookies = None
 
-    @property
-    def tempo_hc_red(self) -> int:
-        """Return the Red HC consumption."""
-        return self._tempo_hc_red
+    def _restore_session(self) -> bool:
+        """Reuse the cached login session if it is still valid."""
+        if self._store is not None:
+            self._cookies = self._store.get_session(self._store_key)
+        return self._cookies is not None
 
-    @property
-    def tempo_hp_red(self) -> int:
-        """Return the Red HP consumption."""
-        return self._tempo_hp_red
+    def _invalidate_session(self) -> None:
+        """Forget the login session rejected by the server."""
+        self._cookies = None
+        if self._store is not None:
+            self._store.clear_session(self._store_key)
 
-    @property
-    def kwh_prod(self) -> int:
-        """Return the production surplus."""
-        return self._kwh_prod
+    def _restore_topology(self) -> bool:
+        """Reuse the cached gateway topology if it is still fresh."""
+        if self._store is None:
+            return False
+        topology = self._store.get_topology(self._store_key, CONF_API_TOPOLOGY_MAX_AGE)
+        if topology is None or "gateways" not in topology:
+            return False
+        # Checked in background once the first data is published
+        self._gateways = topology["gateways"]
+        self._topology_checked = None
+        return True
 
-    @property
-    def indoor_temp(self) -> int:
-        """Return the indoor temperature."""
-        return self._indoor_temp
+    async def _single_flight(self, key, call):
+        """Share the result of an identical in-flight call with every caller."""
+        future = self._in_flight.get(key)
+        if future is None:
+            future = self._in_flight[key] = asyncio.ensure_future(call())
 
-    @property
-    def outdoor_temp(self) -> int:
-        """Return the outdoor temperature."""
-        return self._outdoor_temp
+            def _done(future):
+                self._in_flight.pop(key, None)
+                if not future.cancelled():
+                    # Retrieved by the callers, avoids warnings when all left
+                    future.exception()
 
-    @property
-    def indoor_hum(self) -> int:
-        """Return the indoor humidity."""
-        return self._indoor_hum
+            future.add_done_callback(_done)
+        # A cancelled caller must not cancel the call of the others
+        return await asyncio.shield(future)
 
-    @property
-    def outdoor_hum(self) -> int:
-        """Return the outdoor humidity."""
-        return self._outdoor_hum
+    async def async_prepare(self) -> None:
+        """Log in and discover the gateways unless already done or cached."""
+        if self._cookies is None and not self._restore_session():
+            await self.async_get_cookiesdata()
+        if not self._gateways and not self._restore_topology():
+            await self.async_get_gatewaydata()
 
     async def async_get_cookiesdata(self) -> any:
         """Perform login and return cookies."""
@@ -192,7 +274,10 @@ class LittleMonkeyApiClient:
         }
         try:
             payload_json = json.dumps(login_data)
-            return await self._cookiesapi_wrapper(data=payload_json)
+            return await self._single_flight(
+                "login", lambda: self._cookiesapi_wrapper(data=payload_json))
+        except LittleMonkeyApiClientError:
+            raise
         except Exception as exception:  # pylint: disable=broad-except
             raise LittleMonkeyApiClientError(
                 "Something really wrong happened!"
@@ -204,290 +289,768 @@ class LittleMonkeyApiClient:
             if self._cookies is None:
                 LOGGER.debug("Pas de cookies")
                 # raise exception
-            return await self._gatewayapi_wrapper()
+            return await self._single_flight(
+                "gateways", lambda: self._async_with_session(self._gatewayapi_wrapper))
+        except LittleMonkeyApiClientError:
+            raise
         except Exception as exception:  # pylint: disable=broad-except
             raise LittleMonkeyApiClientError(
                 "Something really wrong happened!"
             ) from exception
 
-    async def fetch_data(self, api):
-        """Retrieve data from a given URL using aiohttp."""
+    async def _async_with_session(self, call):
+        """Run a call, logging in again once if the service rejects the session.
+
+        Only a rejected login is an authentication error, a session also
+        expires on the server side.
+        """
+        cookies = self._cookies
+        try:
+            return await call()
+        except LittleMonkeyApiClientAuthenticationError:
+            # Unless another call already logged in again meanwhile
+            if self._cookies is cookies or self._cookies is None:
+                # 71 bug fix
+                self._invalidate_session()
+                await self.async_get_cookiesdata()
         try:
-            if api['call'] is True:
-                async with async_timeout.timeout(CONF_API_TIMEOUT):
+            return await call()
+        except LittleMonkeyApiClientAuthenticationError as exception:
+            raise LittleMonkeyApiClientError(
+                "Session rejected right after logging in",
+            ) from exception
+
+    async def fetch_data(self, api):
+        """Retrieve the fingerprint and raw payload of a given URL.
+
+        Identical in-flight calls are shared.
+        """
+        if api['call'] is not True:
+            return None
+        if api['url'] in self._in_flight:
+            self._metrics.endpoint(api['endpoint']).shared_calls += 1
+        return await self._single_flight(api['url'], lambda: self._fetch_data(api))
+
+    @property
+    def metrics(self) -> ApiMetrics:
+        """Return the call statistics of the account."""
+        return self._metrics
+
+    @property
+    def breakers(self) -> dict[str, CircuitBreaker]:
+        """Return the circuit breaker of every endpoint called so far."""
+        return self._breakers
+
+    def timeout(self, endpoint: str) -> float:
+        """Return the timeout of an endpoint derived from its recent latencies."""
+        latency = self._metrics.endpoint(endpoint).percentile(
+            0.95, CONF_API_TIMEOUT_MIN_SAMPLES)
+        if latency is None:
+            return CONF_API_TIMEOUT
+        floor, ceiling = self._timeout_bounds
+        return min(max(latency * CONF_API_TIMEOUT_MARGIN, floor), ceiling)
+
+    def _breaker(self, endpoint: str) -> CircuitBreaker:
+        """Return the circuit breaker of an endpoint."""
+        breaker = self._breakers.get(endpoint)
+        if breaker is None:
+            breaker = self._breakers[endpoint] = CircuitBreaker(
+                CONF_API_BREAKER_THRESHOLD,
+                CONF_API_BREAKER_COOLDOWN,
+                CONF_API_BREAKER_MAX_COOLDOWN)
+        return breaker
+
+    def record_outcome(self, endpoint: str, failed: bool | None) -> None:
+        """Count the outcome of a refresh of an endpoint in its circuit breaker."""
+        if failed is None:
+            return
+        if failed:
+            self._breaker(endpoint).record_failure(time.monotonic())
+        else:
+            self._breaker(endpoint).record_success()
+
+    def retry_after(self, endpoint: str) -> float:
+        """Return the seconds until an unavailable endpoint is probed again."""
+        breaker = self._breakers.get(endpoint)
+        if breaker is None:
+            return 0
+        return breaker.retry_after(time.monotonic())
+
+    async def _fetch_data(self, api):
+        """Retrieve a given URL, retrying communication errors with backoff.
+
+        The outcome is counted by the caller, once per refresh of the endpoint.
+        """
+        # An endpoint failing repeatedly is left alone until its cooldown ends
+        breaker = self._breaker(api['endpoint'])
+        if not breaker.allow(time.monotonic()):
+            raise LittleMonkeyApiClientUnavailableError(
+                f"API {api['name']} unavailable",
+            )
+        # The next poll is the retry of the realtime consumption
+        retries = api.get('retries', CONF_API_RETRIES)
+        attempt = 0
+        while True:
+            try:
+                result = await self._async_with_session(lambda: self._fetch_once(api))
+            except LittleMonkeyApiClientCommunicationError:
+                if attempt >= retries or breaker.state is BreakerState.HALF_OPEN:
+                    raise
+                await asyncio.sleep(get_backoff_delay(
+                    attempt, CONF_API_BACKOFF_BASE, CONF_API_BACKOFF_MAX))
+                attempt += 1
+                continue
+            return result
+
+    async def _fetch_once(self, api):
+        """Retrieve the fingerprint and raw payload of a given URL using aiohttp."""
+        key = (api['endpoint'], api['device_id'])
+        # The previous payload of the same URL can be revalidated
+        cached = self._payloads.get(key)
+        if cached is not None and cached[0] != api['url']:
+            cached = None
+        headers = self._headers
+        if cached is not None and cached[1]:
+            headers = {**self._headers, **cached[1]}
+        # Latency is measured once a slot is acquired, without the queueing
+        async with self._semaphore:
+            with self._metrics.measure(api['endpoint']) as sample:
+                try:
+                    async with async_timeout.timeout(self.timeout(api['endpoint'])):
+                        response = await self._session.get(
+                            url=api['url'],
+                            headers=headers,
+                            cookies=self._cookies,
+                        )
+                        if response.status in (401, 403):
+                            raise LittleMonkeyApiClientAuthenticationError(
+                                "Session rejected",
+                            )
+                        if response.status == 304 and cached is not None:
+                            sample.cache_hit = True
+                            return cached[2], cached[3]
+                        if response.status >= 500:
+                            raise LittleMonkeyApiClientCommunicationError(
+                                f"API {api['name']} server error {response.status}",
+                            )
+                        if "application/json" not in response.headers.get("Content-Type", ""):
+                            return None
+                        body = await response.read()
+                    validators = {}
+                    if etag := response.headers.get("ETag"):
+                        validators["If-None-Match"] = etag
+                    if last_modified := response.headers.get("Last-Modified"):
+                        validators["If-Modified-Since"] = last_modified
+                    fingerprint = etag or last_modified or hashlib.sha1(body).hexdigest()
+                    # The payload did not change since the previous call
+                    sample.size = len(body)
+                    sample.cache_hit = cached is not None and cached[2] == fingerprint
+                    self._payloads[key] = (api['url'], validators, fingerprint, body)
+                    return fingerprint, body
+                except LittleMonkeyApiClientError:
+                    raise
+                except asyncio.TimeoutError as exception:
+                    LOGGER.debug("API %s timeout error", api['name'])
+                    raise LittleMonkeyApiClientCommunicationError(
+                        "Timeout error fetching information",
+                    ) from exception
+                except (aiohttp.ClientError, socket.gaierror) as exception:
+                    LOGGER.debug("API %s client error: %s", api['name'], exception)
+                    raise LittleMonkeyApiClientCommunicationError(
+                        "Error fetching information",
+                    ) from exception
+                except Exception as exception:  # pylint: disable=broad-except
+                    LOGGER.error("API %s other error: %s", api['name'], exception)
+                    raise LittleMonkeyApiClientError(
+                        "Something really wrong happened!"
+                    ) from exception
+
+    async def _cookiesapi_wrapper(
+        self,
+        data: dict | None = None,
+    ) -> any:
+        """Get cookies from the API."""
+        with self._metrics.measure("login") as sample:
+            try:
+                async with async_timeout.timeout(self.timeout("login")):
                     response = await self._session.get(
-                        url=api['url'],
+                        url=f"{self._base_url}/login",
                         headers=self._headers,
-                        cookies=self._cookies,
+                        data=data
                     )
                 if response.status in (401, 403):
                     # 71 bug fix
-                    self._cookies = None
+                    self._invalidate_session()
                     raise LittleMonkeyApiClientAuthenticationError(
                         "Invalid credentials",
                     )
+                sample.size = response.content_length or 0
+                # A login without session is an error
+                self._cookies = decode_login(
+                    {name: morsel.value for name, morsel in response.cookies.items()})
+                if self._store is not None:
+                    self._store.set_session(
+                        self._store_key,
+                        self._cookies,
+                        get_cookies_expiry(response.cookies, CONF_API_SESSION_MAX_AGE))
+                # response.raise_for_status()
+                return
+
+            except LittleMonkeyApiClientError:
+                raise
+            except PayloadError as exception:
+                LOGGER.error("API Cookies unexpected payload: %s", exception)
+                raise LittleMonkeyApiClientError(
+                    f"Unexpected login payload: {exception}"
+                ) from exception
+            except asyncio.TimeoutError as exception:
+                LOGGER.error("API Cookies timeout error")
+                raise LittleMonkeyApiClientCommunicationError(
+                    "Timeout error fetching information",
+                ) from exception
+            except (aiohttp.ClientError, socket.gaierror) as exception:
+                LOGGER.error("API Cookies client error: %s", exception)
+                raise LittleMonkeyApiClientCommunicationError(
+                    "Error fetching information",
+                ) from exception
+            except Exception as exception:  # pylint: disable=broad-except
+                LOGGER.error("API Cookies other error: %s", exception)
+                raise LittleMonkeyApiClientError(
+                    "Something really wrong happened!"
+                ) from exception
+
+    async def _gatewayapi_wrapper(self) -> any:
+        """Get gateway Id from the API."""
+        with self._metrics.measure("gateways") as sample:
+            try:
+                async with async_timeout.timeout(self.timeout("gateways")):
+                    response = await self._session.get(
+                        url=f"{self._base_url}/gateways",
+                        headers=self._headers,
+                        cookies=self._cookies,
+                    )
+                if response.status in (401, 403):
+                    raise LittleMonkeyApiClientAuthenticationError(
+                        "Session rejected",
+                    )
                 if "application/json" in response.headers.get("Content-Type", ""):
-                    return await response.json()
-            return None
-        except asyncio.TimeoutError:
-            LOGGER.error("API %s timeout error", api['name'])
-            # raise LittleMonkeyApiClientCommunicationError(
-            #     "Timeout error fetching information",
-            # ) from exception
-        except (aiohttp.ClientError, socket.gaierror) as exception:
-            LOGGER.error("API %s client error: %s", api['name'], exception)
-            # raise LittleMonkeyApiClientCommunicationError(
-            #     "Error fetching information",
-            # ) from exception
-        except Exception as exception:  # pylint: disable=broad-except
-            LOGGER.error("API %s other error: %s", api['name'], exception)
-            # raise LittleMonkeyApiClientError(
-            #     "Something really wrong happened!"
-            # ) from exception
-        return
+                    body = await response.read()
+                    sample.size = len(body)
+                    # Typed and validated payload
+                    topology = {"gateways": decode_gateways(body)}
+
+                    self._gateways = topology["gateways"]
+                    # A failed rediscovery is retried on the next poll
+                    self._topology_checked = time.time()
+                    if self._store is not None:
+                        self._store.set_topology(self._store_key, topology)
+                    # response.raise_for_status()
+                    return
+
+            except LittleMonkeyApiClientError:
+                raise
+            except PayloadError as exception:
+                LOGGER.error("API Gateway unexpected payload: %s", exception)
+                raise LittleMonkeyApiClientError(
+                    f"Unexpected gateways payload: {exception}"
+                ) from exception
+            except asyncio.TimeoutError as exception:
+                LOGGER.error("API Gateway timeout error")
+                raise LittleMonkeyApiClientCommunicationError(
+                    "Timeout error fetching information",
+                ) from exception
+            except (aiohttp.ClientError, socket.gaierror) as exception:
+                LOGGER.error("API Gateway client error: %s", exception)
+                raise LittleMonkeyApiClientCommunicationError(
+                    "Error fetching information",
+                ) from exception
+            except Exception as exception:  # pylint: disable=broad-except
+                LOGGER.error("API Gateway other error: %s", exception)
+                raise LittleMonkeyApiClientError(
+                    "Something really wrong happened!"
+                ) from exception
+
+
+class LittleMonkeyApiClient:
+    """API Client to retrieve ecojoko data."""
+
+    def __init__(
+        self,
+        username: str,
+        password: str,
+        poll_interval: int,
+        use_hchp: bool,
+        use_tempo: bool,
+        use_temphum: bool,
+        use_prod: bool,
+        session: aiohttp.ClientSession,
+        store: LittleMonkeyStore | None = None,
+        account: LittleMonkeyApiAccount | None = None,
+        stat_periods: dict[str, float] | None = None,
+        base_url: str = ECOJOKO_BASE_URL,
+    ) -> None:
+        """Initialize."""
+        self._use_hchp = use_hchp
+        self._use_tempo = use_tempo
+        self._use_temphum = use_temphum
+        self._use_prod = use_prod
+        # Tariff sensors of the enabled options
+        options = {
+            CONF_USE_TEMPO_FEATURE: use_tempo,
+            CONF_USE_HCHP_FEATURE: use_hchp,
+        }
+        self._tariff_sensors = tuple(
+            sensor for option, sensors in TARIFF_OPTIONS.items()
+            if options.get(option) is True
+            for sensor in sensors
+        )
+        # Entries of the same user share one account
+        if account is None:
+            account = LittleMonkeyApiAccount(
+                username=username,
+                password=password,
+                session=session,
+                store=store,
+                base_url=base_url,
+            )
+            account.acquire()
+        self._account = account
+        self._gateways = []
+        self._topology_changes = set()
+        # Payload fingerprint of each endpoint and device
+        self._fingerprints: dict[tuple[str, str], str] = {}
+        # Statistics are published as they land
+        self._update_callback = None
+        # Realtime samples are recorded as they land
+        self._sample_callback = None
+        """Properties."""
+        self._readings: dict[str, DeviceReading] = {}
+
+        """Internal."""
+        # Deadline based refresh of the statistics
+        self._scheduler = StatScheduler(stat_periods or {
+            "powerstat": CONF_API_POWERSTAT_REFRESH,
+            "tempstat": CONF_API_TEMPSTAT_REFRESH,
+            "humstat": CONF_API_HUMSTAT_REFRESH,
+        })
+        # Closed days of the week, reused by the backfill
+        self._closed_days = ClosedDaysCache()
+        # Energy of the day estimated from the realtime power
+        self._integrators: dict[str, EnergyIntegrator] = {}
+        # Event loop time spent decoding and extracting, per poll
+        self._loop_block: dict[str, deque[float]] = {}
+
+    @property
+    def gateways(self) -> list[dict]:
+        """Return the gateways of the account."""
+        return self._gateways
+
+    @property
+    def snapshot(self) -> Snapshot:
+        """Return the latest readings of every device, keyed by device id."""
+        return Snapshot(self._readings)
+
+    @property
+    def store_key(self) -> str:
+        """Return the key of the account in the persistent cache."""
+        return self._account.store_key
+
+    @property
+    def topology_expired(self) -> bool:
+        """Return True if the gateway topology should be rediscovered."""
+        return self._account.topology_expired
+
+    @property
+    def metrics(self) -> ApiMetrics:
+        """Return the call statistics of the shared account."""
+        return self._account.metrics
+
+    @property
+    def breakers(self) -> dict[str, CircuitBreaker]:
+        """Return the circuit breakers of the shared account."""
+        return self._account.breakers
+
+    def retry_after(self, endpoints) -> float:
+        """Return the seconds until unavailable endpoints are probed again.
+
+        Zero as long as one of them was not found unavailable.
+        """
+        breakers = self._account.breakers
+        return min((self._account.retry_after(endpoint) for endpoint in endpoints
+                    if endpoint in breakers), default=0)
+
+    @property
+    def loop_block(self) -> dict[str, dict]:
+        """Return the event loop time blocked by the last polls, in ms."""
+        return {
+            poll: {
+                "last": round(durations[-1] * 1000, 3),
+                "mean": round(sum(durations) / len(durations) * 1000, 3),
+                "max": round(max(durations) * 1000, 3),
+            }
+            for poll, durations in self._loop_block.items() if durations
+        }
+
+    def restore_estimate(self, device_id: str, kwh: float) -> None:
+        """Resume the energy estimate of a power meter published before a restart."""
+        self._integrator(device_id).restore(kwh, get_current_date(TZ))
+
+    def _integrator(self, device_id: str) -> EnergyIntegrator:
+        """Return the energy integrator of a power meter."""
+        integrator = self._integrators.get(device_id)
+        if integrator is None:
+            integrator = self._integrators[device_id] = EnergyIntegrator(CONF_ESTIMATE_MAX_GAP)
+        return integrator
+
+    def set_update_callback(self, update_callback) -> None:
+        """Call update_callback whenever a statistics endpoint landed."""
+        self._update_callback = update_callback
+
+    def set_sample_callback(self, sample_callback) -> None:
+        """Call sample_callback with every new realtime sample of a power meter."""
+        self._sample_callback = sample_callback
+
+    def close(self) -> None:
+        """Stop using the shared account."""
+        self._account.release()
+
+    def _adopt_topology(self) -> None:
+        """Follow the gateway topology of the account."""
+        gateways = self._account.gateways
+        if gateways is self._gateways:
+            return
+        if self._gateways:
+            self._topology_changes |= _topology_changes(self._gateways, gateways)
+        self._gateways = gateways
+        readings = {}
+        for gateway in self._gateways:
+            for device_id in gateway["power_meter_ids"] + gateway["temp_hum_ids"]:
+                readings[device_id] = self._readings.get(device_id, DeviceReading()).update({
+                    "gateway_firmware_version": gateway["gateway_firmware_version"]})
+        self._readings = readings
+
+    def restore_snapshot(self, gateways: list[dict], readings: dict[str, DeviceReading]) -> None:
+        """Start from the topology and readings saved before a restart."""
+        # Followed by the topology of the account on the first poll
+        self._gateways = gateways
+        self._readings = readings
+
+    def snapshot_as_dict(self) -> dict:
+        """Return the topology and readings to save."""
+        return {
+            "gateways": self._gateways,
+            "readings": self.snapshot.as_dict(),
+        }
+
+    def pop_topology_changes(self) -> set[str]:
+        """Return and forget what changed in the topology since last call."""
+        changes, self._topology_changes = self._topology_changes, set()
+        return changes
+
+    async def async_rediscover_topology(self) -> set[str]:
+        """Rediscover the gateway topology and return what changed."""
+        await self._account.async_get_gatewaydata()
+        self._adopt_topology()
+        return self.pop_topology_changes()
+
+    async def async_get_cookiesdata(self) -> any:
+        """Perform login and return cookies."""
+        return await self._account.async_get_cookiesdata()
+
+    async def async_get_gatewaydata(self) -> any:
+        """Get Ecojoko gateway data."""
+        await self._account.async_get_gatewaydata()
+        self._adopt_topology()
+
+    async def async_get_realtime_data(self) -> None:
+        """Get the realtime consumption from ecojoko APIs."""
+        # Realtime and statistics are polled by their own coordinator
+        await self._async_get_data("realtime", self._realtime_apis)
 
-    async def async_get_data(self) -> None:
+    async def async_get_statistics(self) -> None:
+        """Get the due statistics from ecojoko APIs."""
+        await self._async_get_data("statistics", self._statistics_apis, self._update_callback)
+
+    async def _async_get_data(self, poll, get_apis, update_callback=None) -> None:
         """Get data from ecojoko APIs."""
         try:
-            if self._cookies is None:
-                await self.async_get_cookiesdata()
-            if self._gateway_id is None:
-                await self.async_get_gatewaydata()
+            await self._account.async_prepare()
+            self._adopt_topology()
 
             # Initialization
             current_date = get_current_date(TZ)
-            formatted_date = current_date.strftime('%Y-%m-%d')
-            current_time = get_current_time(TZ)
-            current_datetime = datetime.combine(current_date, current_time)
-            #   - powerstat (for Total Consumption + HC/HP + Tempo)
-            if self._last_powerstat_refresh is None:
-                refresh_powerstat = True
-            else:
-                difference = current_datetime - self._last_powerstat_refresh
-                refresh_powerstat = difference > timedelta(
-                    seconds=CONF_API_STAT_REFRESH)
-            #   - Temperature
-            if refresh_powerstat is False:
-                difference = current_datetime - self._last_powerstat_refresh
-                inf = timedelta(seconds=self._poll_interval)
-                sup = timedelta(seconds=2*self._poll_interval)
-                refresh_tempstat = inf < difference < sup
-            else:
-                refresh_tempstat = False
-            #   - Humidity
-            if refresh_powerstat is False and refresh_tempstat is False:
-                difference = current_datetime - self._last_powerstat_refresh
-                inf = timedelta(seconds=2*self._poll_interval)
-                sup = timedelta(seconds=3*self._poll_interval)
-                refresh_humstat = inf < difference < sup
-            else:
-                refresh_humstat = False
-
-            apis = []
-            powermeterurl = f"/{self._gateway_id}/device/{self._power_meter_id}"
-            apis.append({"name": "realtime_conso",
-                        "url": ECOJOKO_GATEWAY_URL + powermeterurl +
-                         "/realtime_conso",
-                         "call": True})
-            apis.append({"name": "powerstat (w)",
-                         "url": ECOJOKO_GATEWAY_URL + powermeterurl +
-                         f"/powerstat/w/{formatted_date}",
-                         "call": refresh_powerstat})
-            temphumurl = f"/{self._gateway_id}/device/{self._temp_hum_id}"
-            apis.append({"name": "tempstat (d)",
-                         "url": ECOJOKO_GATEWAY_URL + temphumurl +
-                         f"/tempstat/d4/{formatted_date}",
-                         "call": refresh_tempstat})
-            apis.append({"name": "humstat (d)",
-                         "url": ECOJOKO_GATEWAY_URL + temphumurl +
-                         f"/humstat/d4/{formatted_date}",
-                         "call": refresh_humstat})
-
-            tasks = [self.fetch_data(api) for api in apis]
-            results = await asyncio.gather(*tasks)
-            if results[0] is not None:
-                self._realtime_conso = results[0]['real_time']['value']
-            week_day = current_date.weekday()
-            if results[1] is not None:
-                data = results[1]['stat']['data']
-                self._kwh = data[week_day]['kwh']
-                # Surplus Production
-                # 78 bug fix
-                if self._use_prod is True and 'kwh_prod' in data[week_day]:
-                    if float(data[week_day]['kwh_prod']) != 0:
-                        self._kwh_prod = abs(float(data[week_day]['kwh_prod']))
-                    else:
-                        self._kwh_prod = 0
-                # Tempo option
-                # 78 bug fix
-                if self._use_tempo is True and 'subconsumption' in data[week_day]:
-                    self._tempo_hc_blue = get_value_from_json_array(
-                        data[week_day]['subconsumption'],
-                        "label",
-                        "HC Bleu",
-                        "kwh")
-                    self._tempo_hp_blue = get_value_from_json_array(
-                        data[week_day]['subconsumption'],
-                        "label",
-                        "HP Bleu",
-                        "kwh")
-                    self._tempo_hc_white = get_value_from_json_array(
-                        data[week_day]['subconsumption'],
-                        "label",
-                        "HC Blanc",
-                        "kwh")
-                    self._tempo_hp_white = get_value_from_json_array(
-                        data[week_day]['subconsumption'],
-                        "label",
-                        "HP Blanc",
-                        "kwh")
-                    self._tempo_hc_red = get_value_from_json_array(
-                        data[week_day]['subconsumption'],
-                        "label",
-                        "HC Rouge",
-                        "kwh")
-                    self._tempo_hp_red = get_value_from_json_array(
-                        data[week_day]['subconsumption'],
-                        "label",
-                        "HP Rouge",
-                        "kwh")
-                # HC/HP option
-                if self._use_tempo is True and self._use_hchp is True:
-                    self._kwh_hc_ns = convert_to_float(self._tempo_hc_blue) + convert_to_float(
-                        self._tempo_hc_white) + convert_to_float(self._tempo_hc_red)
-                    self._kwh_hp_ns = convert_to_float(self._tempo_hp_blue) + convert_to_float(
-                        self._tempo_hp_white) + convert_to_float(self._tempo_hp_red)
-                # 78 bug fix
-                elif self._use_hchp is True and 'subconsumption' in data[week_day]:
-                    # 74 bug fix
-                    for item in data[week_day]['subconsumption']:
-                        if item['label'] == "Heures Creuses" or \
-                                item['label'].startswith("HC"):
-                            self._kwh_hc_ns = convert_to_float(item['kwh'])
-                        if item['label'] == "Heures Pleines" or \
-                                item['label'].startswith("HP"):
-                            self._kwh_hp_ns = convert_to_float(item['kwh'])
-                self._last_powerstat_refresh = datetime.combine(
-                    current_date, current_time)
-            # Temperature
-            if results[2] is not None:
-                data = results[2]['stat']['data']
-                if len(data) > 1:
-                    self._indoor_temp = data[-1]['value']
-                    self._outdoor_temp = data[-1]['ext_value']
-                else:
-                    # LOGGER.debug("TEMP UNE SEULE VALEUR: %s", value_json)
-                    # 101 bug fix
-                    self._indoor_temp = data[0]['value']
-                    self._outdoor_temp = data[0]['ext_value']
-            # Humidity
-            if results[3] is not None:
-                data = results[3]['stat']['data']
-                if len(data) > 1:
-                    self._indoor_hum = data[-1]['value']
-                    self._outdoor_hum = data[-1]['ext_value']
-                else:
-                    # LOGGER.debug("HUM UNE SEULE VALEUR: %s", value_json)
-                    # 101 bug fix
-                    self._indoor_hum = data[0]['value']
-                    self._outdoor_hum = data[0]['ext_value']
-
-            self._status = APIStatus.RUN
-            return
+            now = time.monotonic()
 
-        except Exception:  # pylint: disable=broad-except
-            # traceback.print_exc()
+            apis = [api for api in get_apis(current_date, now) if api['call'] is True]
+            tasks = [self._async_get_api(api, current_date, now, update_callback)
+                     for api in apis]
+            # A failing endpoint does not prevent the others from being published
+            results = await asyncio.gather(*tasks, return_exceptions=True)
+            # One outcome per endpoint and refresh, whatever the number of devices
+            outcomes = {}
+            for api, result in zip(apis, results):
+                failed = _call_failed(result)
+                if failed is not None:
+                    outcomes[api['endpoint']] = outcomes.get(api['endpoint'], True) and failed
+            for endpoint, failed in outcomes.items():
+                self._account.record_outcome(endpoint, failed)
+            failures = [result for result in results if isinstance(result, BaseException)]
+            for failure in failures:
+                if isinstance(failure, LittleMonkeyApiClientAuthenticationError):
+                    raise failure
+            if apis and len(failures) == len(apis):
+                raise failures[0]
+            for api, result in zip(apis, results):
+                if isinstance(result, BaseException):
+                    LOGGER.debug("API %s failed: %s", api['name'], result)
+            self._loop_block.setdefault(
+                poll, deque(maxlen=CONF_API_LOOP_BLOCK_WINDOW)).append(sum(
+                    result for result in results if not isinstance(result, BaseException)))
             return
 
-    async def _cookiesapi_wrapper(
-        self,
-        data: dict | None = None,
-    ) -> any:
-        """Get cookies from the API."""
-        try:
-            async with async_timeout.timeout(CONF_API_TIMEOUT):
-                response = await self._session.get(
-                    url=ECOJOKO_LOGIN_URL,
-                    headers=self._headers,
-                    data=data
-                )
-            if response.status in (401, 403):
-                # 71 bug fix
-                self._cookies = None
-                raise LittleMonkeyApiClientAuthenticationError(
-                    "Invalid credentials",
-                )
-            self._cookies = response.cookies
-            # response.raise_for_status()
-            return
-
-        except asyncio.TimeoutError as exception:
-            LOGGER.error("API Cookies timeout error")
-            raise LittleMonkeyApiClientCommunicationError(
-                "Timeout error fetching information",
-            ) from exception
-        except (aiohttp.ClientError, socket.gaierror) as exception:
-            LOGGER.error("API Cookies client error: %s", exception)
-            raise LittleMonkeyApiClientCommunicationError(
-                "Error fetching information",
-            ) from exception
+        except LittleMonkeyApiClientError:
+            raise
         except Exception as exception:  # pylint: disable=broad-except
-            LOGGER.error("API Cookies other error: %s", exception)
+            # traceback.print_exc()
             raise LittleMonkeyApiClientError(
                 "Something really wrong happened!"
             ) from exception
 
-    async def _gatewayapi_wrapper(self) -> any:
-        """Get gateway Id from the API."""
+    @property
+    def power_meter_ids(self) -> list[str]:
+        """Return the power meters of every gateway."""
+        return [
+            device_id for gateway in self._gateways
+            for device_id in gateway["power_meter_ids"]
+        ]
+
+    def closed_days(self, device_id: str) -> dict:
+        """Return the final power statistics of the past days of the week."""
+        return self._closed_days.closed_days(device_id)
+
+    async def async_get_powerstat_week(self, device_id, date) -> list[PowerstatEntry] | None:
+        """Get the power statistics of the week of a past date, None if unavailable."""
+        gateway = next((gateway for gateway in self._gateways
+                        if device_id in gateway["power_meter_ids"]), None)
+        if gateway is None:
+            return None
+        # Own endpoint, the history must not evict the payloads of the polls
         try:
-            async with async_timeout.timeout(CONF_API_TIMEOUT):
-                response = await self._session.get(
-                    url=ECOJOKO_GATEWAYS_URL,
-                    headers=self._headers,
-                    cookies=self._cookies,
-                )
-            if response.status in (401, 403):
-                # 71 bug fix
-                self._cookies = None
-                raise LittleMonkeyApiClientAuthenticationError(
-                    "Invalid credentials",
-                )
-            if "application/json" in response.headers.get("Content-Type", ""):
-                value_json = await response.json()
-                gateways = value_json.get('gateways')
-
-                # Looking for gateway Id
-                gateway_id = gateways[0].get('gateway_id')
-                self._gateway_id = gateway_id
-
-                # Looking for gateway firmware
-                gateway_firmware_version = gateways[0].get(
-                    'gateway_firmware_version')
-                self._gateway_firmware_version = gateway_firmware_version
-
-                value_json = gateways[0].get('devices')
-                # Looking for humidity temperature and  power meter devices id
-                for item in value_json:
-                    if item["device_type"] == "TEMP_HUM":
-                        self._temp_hum_id = item["device_id"]
-                    if item["device_type"] == "POWER_METER":
-                        self._power_meter_id = item["device_id"]
+            result = await self._account.fetch_data({
+                "name": "powerstat (backfill)",
+                "endpoint": "backfill",
+                "device_id": device_id,
+                "url": f"{self._account.base_url}/gateway/{gateway['gateway_id']}/device/"
+                       f"{device_id}/powerstat/w/{date.strftime('%Y-%m-%d')}",
+                "call": True,
+            })
+            entries = None
+            if result is not None:
+                entries = await asyncio.get_running_loop().run_in_executor(
+                    None, decode_powerstat, result[1])
+        except PayloadError as exception:
+            LOGGER.error("API powerstat (backfill) unexpected payload: %s", exception)
+            self._account.record_outcome("backfill", True)
+            return None
+        except Exception as exception:
+            self._account.record_outcome("backfill", _call_failed(exception))
+            raise
+        self._account.record_outcome("backfill", False)
+        return entries
 
-                # response.raise_for_status()
-                return
+    def _realtime_apis(self, current_date, now) -> list[dict]:
+        """Return the realtime calls of every power meter."""
+        # One call per endpoint and device of every gateway
+        apis = []
+        for gateway in self._gateways:
+            gatewayurl = f"{self._account.base_url}/gateway/{gateway['gateway_id']}/device"
+            for device_id in gateway["power_meter_ids"]:
+                powermeterurl = f"{gatewayurl}/{device_id}"
+                apis.append({"name": "realtime_conso",
+                             "endpoint": "realtime_conso",
+                             "device_id": device_id,
+                             "url": powermeterurl + "/realtime_conso",
+                             "call": True,
+                             "retries": 0,
+                             "decode": decode_realtime_conso,
+                             "parse": partial(self._parse_realtime_conso, device_id),
+                             "sample": partial(self._sample_realtime_conso, device_id)})
+        return apis
 
-        except asyncio.TimeoutError as exception:
-            LOGGER.error("API Gateway timeout error")
-            raise LittleMonkeyApiClientCommunicationError(
-                "Timeout error fetching information",
-            ) from exception
-        except (aiohttp.ClientError, socket.gaierror) as exception:
-            LOGGER.error("API Gateway client error: %s", exception)
-            raise LittleMonkeyApiClientCommunicationError(
-                "Error fetching information",
-            ) from exception
-        except Exception as exception:  # pylint: disable=broad-except
-            LOGGER.error("API Gateway other error: %s", exception)
+    def _statistics_apis(self, current_date, now) -> list[dict]:
+        """Return the statistics calls of every device."""
+        formatted_date = current_date.strftime('%Y-%m-%d')
+        scheduler = self._scheduler
+        # One call per endpoint and device of every gateway
+        apis = []
+        for gateway in self._gateways:
+            gatewayurl = f"{self._account.base_url}/gateway/{gateway['gateway_id']}/device"
+            for device_id in gateway["power_meter_ids"]:
+                powermeterurl = f"{gatewayurl}/{device_id}"
+                #   - powerstat (for Total Consumption + HC/HP + Tempo)
+                # /powerstat/w is the cheapest resolution the API offers for the current day
+                apis.append({"name": "powerstat (w)",
+                             "endpoint": "powerstat",
+                             "device_id": device_id,
+                             "url": powermeterurl +
+                             f"/powerstat/w/{formatted_date}",
+                             "call": scheduler.is_due("powerstat", device_id, now),
+                             "decode": decode_powerstat,
+                             "parse": partial(self._parse_powerstat_week, device_id)})
+            if self._use_temphum is not True:
+                continue
+            for device_id in gateway["temp_hum_ids"]:
+                temphumurl = f"{gatewayurl}/{device_id}"
+                #   - Temperature
+                apis.append({"name": "tempstat (d)",
+                             "endpoint": "tempstat",
+                             "device_id": device_id,
+                             "url": temphumurl +
+                             f"/tempstat/d4/{formatted_date}",
+                             "call": scheduler.is_due("tempstat", device_id, now),
+                             "decode": decode_stat,
+                             "parse": self._parse_tempstat})
+                #   - Humidity
+                apis.append({"name": "humstat (d)",
+                             "endpoint": "humstat",
+                             "device_id": device_id,
+                             "url": temphumurl +
+                             f"/humstat/d4/{formatted_date}",
+                             "call": scheduler.is_due("humstat", device_id, now),
+                             "decode": decode_stat,
+                             "parse": self._parse_humstat})
+        return apis
+
+    async def _async_get_api(self, api, current_date, now, update_callback=None) -> float:
+        """Fetch an endpoint and apply its values as soon as they land.
+
+        Return the time the event loop was blocked by the payload. An unexpected
+        payload raises, without marking the call done.
+        """
+        result = await self._account.fetch_data(api)
+        if result is None:
+            return 0.0
+        updated, blocked = await self._async_apply_result(api, result, current_date)
+        if api['endpoint'] != "realtime_conso":
+            self._scheduler.mark_done(api['endpoint'], api['device_id'], now)
+        # Published without waiting for the slower endpoints
+        if updated and update_callback is not None:
+            update_callback()
+        return blocked
+
+    async def _async_apply_result(self, api, result, current_date) -> tuple[bool, float]:
+        """Extract the values of a payload.
+
+        Return True if they were updated, and the time the event loop was blocked.
+        """
+        # An unchanged payload is neither decoded nor extracted
+        key = (api['endpoint'], api['device_id'])
+        fingerprint, body = result
+        if self._fingerprints.get(key) == fingerprint:
+            start = time.perf_counter()
+            # Still a sample of the unchanged values
+            updated = self._apply_values(api, {}, current_date)
+            return updated, time.perf_counter() - start
+        try:
+            # Large statistics are decoded off the event loop
+            if len(body) > CONF_API_INLINE_DECODE_MAX:
+                decoded = await asyncio.get_running_loop().run_in_executor(
+                    None, api['decode'], body)
+                start = time.perf_counter()
+            else:
+                start = time.perf_counter()
+                # Typed and validated payloads
+                decoded = api['decode'](body)
+            reading = self._readings.get(api['device_id'])
+            if reading is None:
+                # The device left the topology meanwhile
+                return False, time.perf_counter() - start
+            values = {}
+            api['parse'](values, decoded, current_date)
+        except PayloadError as exception:
+            # A failure of the endpoint, the call stays due
+            LOGGER.error("API %s unexpected payload: %s", api['name'], exception)
             raise LittleMonkeyApiClientError(
-                "Something really wrong happened!"
+                f"API {api['name']} unexpected payload",
             ) from exception
+        self._fingerprints[key] = fingerprint
+        updated = self._apply_values(api, values, current_date)
+        return updated, time.perf_counter() - start
+
+    def _apply_values(self, api, values, current_date) -> bool:
+        """Update the reading of a device with new values, True if it changed."""
+        reading = self._readings.get(api['device_id'])
+        if reading is None:
+            return False
+        if 'sample' in api:
+            # Every successful fetch is a sample, even of an unchanged payload
+            api['sample'](values, reading, current_date)
+        # Readings are immutable, the mapping is replaced when one changes
+        updated = reading.update(values)
+        if updated is reading:
+            return False
+        self._readings = {**self._readings, api['device_id']: updated}
+        return True
+
+    def _parse_realtime_conso(self, device_id, values, realtime_consumption,
+                              current_date) -> None:
+        """Extract the realtime consumption of a power meter."""
+        values["realtime_consumption"] = realtime_consumption
+
+    def _sample_realtime_conso(self, device_id, values, reading, current_date) -> None:
+        """Integrate and record the latest realtime consumption of a power meter."""
+        watts = values.get("realtime_consumption", reading.realtime_consumption)
+        if watts is None:
+            return
+        integrator = self._integrator(device_id)
+        integrator.add_sample(watts, time.monotonic(), current_date)
+        values["estimated_grid_consumption"] = integrator.estimate
+        if self._sample_callback is not None:
+            self._sample_callback(device_id, time.time(), watts)
+
+    def _parse_powerstat_week(self, device_id, values, entries, current_date) -> None:
+        """Extract the energy consumption of a power meter from its week."""
+        if len(entries) <= current_date.weekday():
+            raise PayloadError(f"$.stat.data: no entry for week day {current_date.weekday()}")
+        self._parse_powerstat(device_id, values, entries[current_date.weekday()], current_date)
+        self._closed_days.store_week(device_id, entries, current_date)
+
+    def _parse_powerstat(self, device_id, values, entry: PowerstatEntry, current_date) -> None:
+        """Extract the energy consumption of a power meter from a day entry."""
+        values.update(self.powerstat_values(entry))
+        # The estimate restarts from the energy of the day
+        integrator = self._integrator(device_id)
+        integrator.anchor(entry.kwh, current_date)
+        values["estimated_grid_consumption"] = integrator.estimate
+
+    def powerstat_values(self, entry: PowerstatEntry) -> dict[str, float | None]:
+        """Return the energy of every enabled sensor of a power statistics entry."""
+        values = {"grid_consumption": entry.kwh}
+        # Surplus Production
+        # 78 bug fix
+        if self._use_prod is True and entry.kwh_prod is not None:
+            values["production_surplus"] = abs(entry.kwh_prod)
+        # Tempo and HC/HP options
+        # 78 bug fix
+        # Every tariff sensor from a single pass over the subconsumption
+        if self._tariff_sensors and entry.subconsumption is not None:
+            index = index_subconsumption(entry.subconsumption)
+            for sensor in self._tariff_sensors:
+                values[sensor] = index.get(sensor, 0.0)
+        return values
+
+    def _parse_tempstat(self, values, samples, current_date) -> None:
+        """Extract the latest temperatures of a temperature sensor."""
+        # 101 bug fix
+        if not samples:
+            raise PayloadError("$.stat.data: empty")
+        values["indoor_temp"] = samples[-1].value
+        values["outdoor_temp"] = samples[-1].ext_value
+
+    def _parse_humstat(self, values, samples, current_date) -> None:
+        """Extract the latest humidities of a humidity sensor."""
+        # 101 bug fix
+        if not samples:
+            raise PayloadError("$.stat.data: empty")
+        values["indoor_hum"] = samples[-1].value
+        values["outdoor_hum"] = samples[-1].ext_value
@@ -0,0 +1,195 @@
+"""Backfill of the power statistics into the long-term statistics for little_monkey."""
+from __future__ import annotations
+
+import asyncio
+import datetime
+
+from homeassistant.components.recorder import get_instance
+from homeassistant.components.recorder.models import StatisticData, StatisticMetaData
+from homeassistant.components.recorder.statistics import (
+    async_add_external_statistics,
+    get_last_statistics,
+)
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import CONF_NAME, UnitOfEnergy
+from homeassistant.core import HomeAssistant, callback
+
+from .api import LittleMonkeyApiClient
+from .const import (
+    CONF_BACKFILL_BUDGET,
+    CONF_BACKFILL_CONCURRENCY,
+    CONF_BACKFILL_DAYS,
+    DOMAIN,
+    LOGGER,
+)
+from .decoders import PowerstatEntry
+from .store import LittleMonkeyStore
+from .utils import get_current_date, get_paris_timezone
+
+TZ = get_paris_timezone()
+ONE_DAY = datetime.timedelta(days=1)
+
+
+class LittleMonkeyBackfill:
+    """Import the closed days of the power meters as external statistics.
+
+    Weeks are walked from the oldest missing day with a bounded concurrency,
+    and at most CONF_BACKFILL_BUDGET of them are downloaded per run. The last
+    imported day and the sums of every series are checkpointed once the
+    recorder stored them, so that the next run resumes where the previous one
+    stopped.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        entry: ConfigEntry,
+        client: LittleMonkeyApiClient,
+        store: LittleMonkeyStore,
+        names: dict[str, str],
+    ) -> None:
+        """Initialize."""
+        self._hass = hass
+        self._entry = entry
+        self._client = client
+        self._store = store
+        self._names = names
+        self._task: asyncio.Task | None = None
+
+    @callback
+    def async_schedule(self, *_) -> None:
+        """Start a backfill run unless one is running."""
+        if self._task is not None and not self._task.done():
+            return
+        self._task = self._entry.async_create_background_task(
+            self._hass, self.async_run(), f"{DOMAIN} backfill")
+
+    async def async_run(self) -> None:
+        """Import the missing days of every power meter, within the budget."""
+        budget = CONF_BACKFILL_BUDGET
+        # Named like the sensors, the last power meter of a gateway plainly
+        for index, gateway in enumerate(self._client.gateways):
+            device_name = self._entry.data.get(CONF_NAME)
+            if index > 0:
+                device_name = f"{device_name} {gateway['gateway_id']}"
+            power_meter_ids = gateway["power_meter_ids"]
+            for device_index, device_id in enumerate(power_meter_ids):
+                if budget <= 0:
+                    return
+                if device_index < len(power_meter_ids) - 1:
+                    suffix = f" {device_index + 1}"
+                else:
+                    suffix = ""
+                budget -= await self._async_backfill_device(
+                    device_id, device_name, suffix, budget)
+
+    async def _async_backfill_device(self, device_id: str, device_name: str,
+                                     suffix: str, budget: int) -> int:
+        """Import the missing days of a power meter, return the weeks walked."""
+        yesterday = get_current_date(TZ) - ONE_DAY
+        checkpoint = self._store.get_backfill(self._client.store_key, str(device_id)) or {}
+        if "date" in checkpoint:
+            start = datetime.date.fromisoformat(checkpoint["date"]) + ONE_DAY
+        else:
+            start = yesterday + ONE_DAY - datetime.timedelta(days=CONF_BACKFILL_DAYS)
+        mondays = []
+        monday = start - datetime.timedelta(days=start.weekday())
+        while monday <= yesterday and len(mondays) < budget:
+            mondays.append(monday)
+            monday += datetime.timedelta(days=7)
+        if not mondays:
+            return 0
+
+        semaphore = asyncio.Semaphore(CONF_BACKFILL_CONCURRENCY)
+        closed = self._client.closed_days(device_id)
+
+        async def _async_get_week(monday):
+            """Return the entries of the days of a week."""
+            days = [monday + datetime.timedelta(days=week_day) for week_day in range(7)]
+            wanted = [day for day in days if start <= day <= yesterday]
+            # The closed days of the current week are already known
+            if all(day in closed for day in wanted):
+                return {day: closed[day] for day in wanted}
+            async with semaphore:
+                entries = await self._client.async_get_powerstat_week(device_id, monday)
+            if entries is None:
+                return None
+            return dict(zip(days, entries))
+
+        weeks = await asyncio.gather(
+            *(_async_get_week(monday) for monday in mondays), return_exceptions=True)
+
+        sums = dict(checkpoint.get("sums", {}))
+        statistics: dict[str, list[StatisticData]] = {}
+        last_day = None
+        # Imported in order, up to the first week that failed
+        for monday, week in zip(mondays, weeks):
+            if week is None or isinstance(week, BaseException):
+                LOGGER.debug("Backfill of %s stopped at the week of %s: %s",
+                             device_id, monday, week)
+                break
+            for day, entry in sorted(week.items()):
+                if start <= day <= yesterday:
+                    self._add_day(statistics, sums, day, entry)
+                    last_day = day
+        if last_day is None:
+            return len(mondays)
+
+        # One batched write per series
+        imported = {}
+        for series, rows in statistics.items():
+            metadata = self._metadata(device_id, device_name, suffix, series)
+            async_add_external_statistics(self._hass, metadata, rows)
+            imported[metadata["statistic_id"]] = rows[-1]["start"]
+        # The checkpoint must not get ahead of what the recorder stored
+        if not await self._async_stored(imported):
+            LOGGER.warning("Backfill of %s was not stored by the recorder", device_id)
+            return len(mondays)
+        self._store.set_backfill(self._client.store_key, str(device_id), {
+            "date": last_day.isoformat(),
+            "sums": sums,
+        })
+        LOGGER.debug("Backfill of %s imported up to %s", device_id, last_day)
+        return len(mondays)
+
+    async def _async_stored(self, imported: dict[str, datetime.datetime]) -> bool:
+        """Return whether the recorder stored the last row of every statistic."""
+        recorder = get_instance(self._hass)
+        await recorder.async_block_till_done()
+        for statistic_id, start in imported.items():
+            last = await recorder.async_add_executor_job(
+                get_last_statistics, self._hass, 1, statistic_id, False, {"sum"})
+            if not last or last[statistic_id][0]["start"] < start.timestamp():
+                return False
+        return True
+
+    def _add_day(
+        self,
+        statistics: dict[str, list[StatisticData]],
+        sums: dict[str, float],
+        day: datetime.date,
+        entry: PowerstatEntry,
+    ) -> None:
+        """Add the energy of a closed day to the statistics of every series."""
+        if entry.kwh is None:
+            # Before the power meter was installed
+            return
+        start = TZ.localize(datetime.datetime.combine(day, datetime.time()))
+        for series, kwh in self._client.powerstat_values(entry).items():
+            if kwh is None:
+                continue
+            sums[series] = round(sums.get(series, 0.0) + kwh, 3)
+            statistics.setdefault(series, []).append(
+                StatisticData(start=start, state=kwh, sum=sums[series]))
+
+    def _metadata(self, device_id: str, device_name: str, suffix: str,
+                  series: str) -> StatisticMetaData:
+        """Return the metadata of the statistics of a series."""
+        return StatisticMetaData(
+            has_mean=False,
+            has_sum=True,
+            name=f"{device_name} - {self._names.get(series, series)}{suffix}",
+            source=DOMAIN,
+            statistic_id=f"{DOMAIN}:{device_id}_{series}".lower(),
+            unit_of_measurement=UnitOfEnergy.KILO_WATT_HOUR,
+        )
@@ -0,0 +1,64 @@
+"""Circuit breaker for little_monkey APIs."""
+from __future__ import annotations
+
+from enum import Enum
+
+
+class BreakerState(Enum):
+    """Circuit breaker state enum."""
+
+    CLOSED = 0
+    OPEN = 1
+    HALF_OPEN = 2
+
+
+class CircuitBreaker:
+    """Stop calling an endpoint after repeated failures, then probe it."""
+
+    def __init__(self, threshold: int, cooldown: float, max_cooldown: float) -> None:
+        """Initialize with the failures opening the breaker and its cooldown, in seconds."""
+        self._threshold = threshold
+        self._base_cooldown = cooldown
+        self._max_cooldown = max_cooldown
+        self._cooldown = cooldown
+        self._failures = 0
+        self._opened = 0.0
+        self._state = BreakerState.CLOSED
+
+    @property
+    def state(self) -> BreakerState:
+        """Return the state of the breaker."""
+        return self._state
+
+    def retry_after(self, now: float) -> float:
+        """Return the seconds until the endpoint is probed again, 0 if closed."""
+        if self._state is BreakerState.CLOSED:
+            return 0
+        return max(0, self._opened + self._cooldown - now)
+
+    def allow(self, now: float) -> bool:
+        """Return True if the endpoint may be called."""
+        if self._state is BreakerState.CLOSED:
+            return True
+        if self._state is BreakerState.OPEN and now >= self._opened + self._cooldown:
+            # A single probe until it succeeds or fails
+            self._state = BreakerState.HALF_OPEN
+            return True
+        return False
+
+    def record_success(self) -> None:
+        """Close the breaker after a successful call."""
+        self._state = BreakerState.CLOSED
+        self._failures = 0
+        self._cooldown = self._base_cooldown
+
+    def record_failure(self, now: float) -> None:
+        """Count a failed call, opening the breaker when needed."""
+        self._failures += 1
+        if self._state is BreakerState.HALF_OPEN:
+            # The probe failed, wait longer before the next one
+            self._cooldown = min(self._cooldown * 2, self._max_cooldown)
+        elif self._failures < self._threshold:
+            return
+        self._state = BreakerState.OPEN
+        self._opened = now
@@ -0,0 +1,36 @@
+"""Closed days of the power statistics, for the backfill of little_monkey."""
+from __future__ import annotations
+
+import datetime
+
+from .decoders import PowerstatEntry
+
+# Closed days kept once they left the current week
+CLOSED_DAYS_MAX = 7
+
+
+class ClosedDaysCache:
+    """Keep the closed days of the weeks polled, so the backfill does not download them."""
+
+    def __init__(self) -> None:
+        """Initialize."""
+        self._closed: dict[str, dict[datetime.date, PowerstatEntry]] = {}
+
+    def closed_days(self, device_id: str) -> dict[datetime.date, PowerstatEntry]:
+        """Return the final entries of the past days of the device."""
+        return self._closed.get(device_id, {})
+
+    def store_week(
+        self,
+        device_id: str,
+        data: list[PowerstatEntry],
+        current_date: datetime.date,
+    ) -> None:
+        """Keep the closed days of a week downloaded on the current date."""
+        monday = current_date - datetime.timedelta(days=current_date.weekday())
+        closed = self._closed.setdefault(device_id, {})
+        for week_day, entry in enumerate(data[:current_date.weekday()]):
+            closed[monday + datetime.timedelta(days=week_day)] = entry
+        oldest = current_date - datetime.timedelta(days=CLOSED_DAYS_MAX)
+        for day in [day for day in closed if day < oldest]:
+            del closed[day]
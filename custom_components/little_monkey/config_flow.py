@@ -26,11 +26,15 @@ from .const import (
     CONF_USE_TEMPO_FEATURE,
     CONF_USE_TEMPHUM_FEATURE,
     CONF_USE_PROD_FEATURE,
+    CONF_USE_SAMPLES_FEATURE,
     CONF_LANG,
+    CONF_BASE_URL,
     DEFAULT_LANG,
+    ECOJOKO_BASE_URL,
     LANG_CODES,
     LOGGER
 )
+from .store import async_get_store
 
 def _get_data_schema(config_entry: config_entries.ConfigEntry | None = None) -> vol.Schema:
     """Get a schema with default values."""
@@ -60,6 +64,9 @@ def _get_data_schema(config_entry: config_entries.ConfigEntry | None = None) ->
                 vol.Optional(
                     CONF_USE_TEMPHUM_FEATURE, default=False,
                 ): cv.boolean,
+                vol.Optional(
+                    CONF_USE_SAMPLES_FEATURE, default=False,
+                ): cv.boolean,
                 vol.Required(POLL_INTERVAL, default=DEFAULT_POLL_INTERVAL): selector.NumberSelector(
                         selector.NumberSelectorConfig(
                             mode=NumberSelectorMode.BOX,
@@ -109,6 +116,10 @@ def _get_data_schema(config_entry: config_entries.ConfigEntry | None = None) ->
             vol.Optional(
                 CONF_USE_TEMPHUM_FEATURE, default=config_entry.data.get(CONF_USE_TEMPHUM_FEATURE),
             ): cv.boolean,
+            vol.Optional(
+                CONF_USE_SAMPLES_FEATURE,
+                default=config_entry.data.get(CONF_USE_SAMPLES_FEATURE, False),
+            ): cv.boolean,
             vol.Required(
                 POLL_INTERVAL, default=config_entry.data.get(POLL_INTERVAL)
                 ): selector.NumberSelector(
@@ -155,7 +166,8 @@ class EcojokoFlowHandler(config_entries.ConfigFlow, domain=DOMAIN):
                     use_hchp=user_input[CONF_USE_HCHP_FEATURE],
                     use_tempo=user_input[CONF_USE_TEMPO_FEATURE],
                     use_temphum=user_input[CONF_USE_TEMPHUM_FEATURE],
-                    use_prod=user_input[CONF_USE_PROD_FEATURE]
+                    use_prod=user_input[CONF_USE_PROD_FEATURE],
+                    base_url=user_input.get(CONF_BASE_URL, ECOJOKO_BASE_URL),
                 )
             except LittleMonkeyApiClientAuthenticationError as exception:
                 LOGGER.warning(exception)
@@ -185,7 +197,8 @@ class EcojokoFlowHandler(config_entries.ConfigFlow, domain=DOMAIN):
                            use_hchp: bool,
                            use_temphum: bool,
                            use_tempo: bool,
-                           use_prod: bool) -> None:
+                           use_prod: bool,
+                           base_url: str = ECOJOKO_BASE_URL) -> None:
         client = LittleMonkeyApiClient(
             username=username,
             password=password,
@@ -195,6 +208,8 @@ class EcojokoFlowHandler(config_entries.ConfigFlow, domain=DOMAIN):
             use_temphum=use_temphum,
             use_prod=use_prod,
             session=async_create_clientsession(self.hass),
+            store=await async_get_store(self.hass),
+            base_url=base_url,
         )
         await client.async_get_cookiesdata()
 
@@ -221,10 +236,11 @@ class EcojokoOptionsFlowHandler(config_entries.OptionsFlow):
         """Configure options for Ecojoko."""
 
         if user_input is not None:
-            # Update config entry with data from user input
+            # Update config entry with data from user input, keeping the
+            # data the form does not show, such as the service
             self.hass.config_entries.async_update_entry(
                 entry=self._config_entry,
-                data=user_input,
+                data={**self._config_entry.data, **user_input},
                 # options={ CONF_LANG: DEFAULT_LANG }
             )
 
@@ -236,6 +252,7 @@ class EcojokoOptionsFlowHandler(config_entries.OptionsFlow):
                 use_tempo=user_input[CONF_USE_TEMPO_FEATURE],
                 use_temphum=user_input[CONF_USE_TEMPHUM_FEATURE],
                 use_prod=user_input[CONF_USE_PROD_FEATURE],
+                base_url=self._config_entry.data.get(CONF_BASE_URL, ECOJOKO_BASE_URL),
             )
 
             await self._get_gateway(client)
@@ -261,7 +278,8 @@ class EcojokoOptionsFlowHandler(config_entries.OptionsFlow):
                            use_hchp: bool,
                            use_tempo: bool,
                            use_temphum: bool,
-                           use_prod: bool) -> LittleMonkeyApiClient:
+                           use_prod: bool,
+                           base_url: str = ECOJOKO_BASE_URL) -> LittleMonkeyApiClient:
         client = LittleMonkeyApiClient(
             username=username,
             password=password,
@@ -271,6 +289,8 @@ class EcojokoOptionsFlowHandler(config_entries.OptionsFlow):
             use_temphum=use_temphum,
             use_prod=use_prod,
             session=async_create_clientsession(self.hass),
+            store=await async_get_store(self.hass),
+            base_url=base_url,
         )
         await client.async_get_cookiesdata()
         return client
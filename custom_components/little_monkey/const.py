@@ -17,6 +17,7 @@ CONF_USE_HCHP_FEATURE = "use_hchp_feature"
 CONF_USE_TEMPO_FEATURE = "use_tempo_feature"
 CONF_USE_TEMPHUM_FEATURE = "use_temphum_feature"
 CONF_USE_PROD_FEATURE = "use_prod_feature"
+CONF_USE_SAMPLES_FEATURE = "use_samples_feature"
 CONF_LANG = 'lang'
 DEFAULT_LANG = 'fr-FR'
 # Language Supported Codes
@@ -24,9 +25,76 @@ LANG_CODES = ['fr-FR', 'en-US', 'pt-PT']
 
 # APIs
 CONF_API_TIMEOUT = 3
+CONF_API_TIMEOUT_FLOOR = 1
+CONF_API_TIMEOUT_CEILING = 10
+CONF_API_TIMEOUT_MARGIN = 2
+CONF_API_TIMEOUT_MIN_SAMPLES = 10
 CONF_API_STAT_REFRESH = 30
+CONF_API_POWERSTAT_REFRESH = CONF_API_STAT_REFRESH
+CONF_API_TEMPSTAT_REFRESH = CONF_API_STAT_REFRESH
+CONF_API_HUMSTAT_REFRESH = CONF_API_STAT_REFRESH
+CONF_API_STAT_POLL_INTERVAL = 10
+CONF_API_SESSION_MAX_AGE = 43200
+CONF_API_TOPOLOGY_MAX_AGE = 86400
+CONF_API_MAX_CONCURRENCY = 4
+CONF_API_RETRIES = 2
+CONF_API_BACKOFF_BASE = 0.5
+CONF_API_BACKOFF_MAX = 2
+CONF_API_BREAKER_THRESHOLD = 5
+CONF_API_BREAKER_COOLDOWN = 60
+CONF_API_BREAKER_MAX_COOLDOWN = 900
+# Bytes above which a payload is decoded in the executor
+CONF_API_INLINE_DECODE_MAX = 8192
+CONF_API_LOOP_BLOCK_WINDOW = 100
+# Seconds without realtime sample after which the energy estimate is not integrated
+CONF_ESTIMATE_MAX_GAP = 180
+# Historical power statistics imported as long-term statistics
+CONF_BACKFILL_DAYS = 365
+CONF_BACKFILL_INTERVAL = 3600
+CONF_BACKFILL_CONCURRENCY = 2
+# Weeks downloaded per run and entry
+CONF_BACKFILL_BUDGET = 26
+# Realtime samples kept per power meter: 4 weeks every 5 seconds, 12 bytes each
+CONF_SAMPLES_CAPACITY = 483840
+# Points returned at most by the realtime samples service
+CONF_SAMPLES_MAX_POINTS = 10000
+SAMPLES_DIR = f"{DOMAIN}_samples"
+SERVICE_GET_REALTIME_SAMPLES = "get_realtime_samples"
+# Seconds between two saves of the last good snapshot
+CONF_SNAPSHOT_SAVE_INTERVAL = 300
+ATTR_RESTORED_FROM = "restored_from"
+
+# Sensors fed by each endpoint
+ENDPOINT_SENSORS = {
+    "realtime_conso": ("realtime_consumption", "estimated_grid_consumption"),
+    "powerstat": (
+        "grid_consumption",
+        "hc_grid_consumption",
+        "hp_grid_consumption",
+        "blue_hc_grid_consumption",
+        "blue_hp_grid_consumption",
+        "white_hc_grid_consumption",
+        "white_hp_grid_consumption",
+        "red_hc_grid_consumption",
+        "red_hp_grid_consumption",
+        "production_surplus",
+    ),
+    "tempstat": ("indoor_temp", "outdoor_temp"),
+    "humstat": ("indoor_hum", "outdoor_hum"),
+}
+SENSOR_ENDPOINTS = {
+    sensor: endpoint
+    for endpoint, sensors in ENDPOINT_SENSORS.items()
+    for sensor in sensors
+}
+
+# Storage
+STORAGE_VERSION = 1
+STORAGE_KEY = f"{DOMAIN}.cache"
+STORAGE_SAVE_DELAY = 10
+DATA_STORE = f"{DOMAIN}_store"
 
 # URLs
-ECOJOKO_LOGIN_URL = "https://service.ecojoko.com/login"
-ECOJOKO_GATEWAYS_URL = "https://service.ecojoko.com/gateways"
-ECOJOKO_GATEWAY_URL = "https://service.ecojoko.com/gateway"
+# Another service, such as a local stub, can be set in the entry data
+CONF_BASE_URL = "base_url"
+ECOJOKO_BASE_URL = "https://service.ecojoko.com"
@@ -2,15 +2,17 @@
 from __future__ import annotations
 
 from datetime import timedelta
-from homeassistant.util import json
+from pathlib import Path
+import time
 
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers.update_coordinator import (
     DataUpdateCoordinator,
     UpdateFailed,
 )
 from homeassistant.exceptions import ConfigEntryAuthFailed
+from homeassistant.util import dt as dt_util
 
 from .api import (
     LittleMonkeyApiClient,
@@ -21,96 +23,96 @@ from .const import (
     DOMAIN,
     CONF_LANG,
     POLL_INTERVAL,
+    CONF_API_STAT_POLL_INTERVAL,
+    CONF_SAMPLES_CAPACITY,
+    CONF_SNAPSHOT_SAVE_INTERVAL,
+    CONF_USE_SAMPLES_FEATURE,
+    SAMPLES_DIR,
     LOGGER
 )
+from .models import DeviceReading
+from .samples import LittleMonkeySamples
+from .store import LittleMonkeyStore
+from .translations_cache import async_get_translations
 
 # https://developers.home-assistant.io/docs/integration_fetching_data#coordinated-single-api-poll-for-data-for-all-entities
 
 
-class LittleMonkeyDataUpdateCoordinator(DataUpdateCoordinator):
-    """Class to manage fetching data from the Ecojoko APIs."""
+def samples_directory(hass: HomeAssistant, entry: ConfigEntry) -> Path:
+    """Return the directory of the realtime samples of an entry."""
+    return Path(hass.config.path(".storage", SAMPLES_DIR, entry.entry_id))
+
+
+class LittleMonkeyBaseUpdateCoordinator(DataUpdateCoordinator):
+    """Base class of the coordinators polling a group of Ecojoko endpoints."""
 
     config_entry: ConfigEntry
+    endpoints: tuple[str, ...] = ()
 
     def __init__(
         self,
         hass: HomeAssistant,
         entry: ConfigEntry,
         client: LittleMonkeyApiClient,
+        name: str,
+        poll_interval: timedelta,
     ) -> None:
         """Initialize."""
         self.hass = hass
         self.config_entry = entry
         self.client = client
-        self._lang = entry.options[CONF_LANG]
-        # 93 bug fix
-        self._tranfile = None
+        # Availability the entities were last notified of
+        self._notified_success = None
+        self._poll_interval = poll_interval
+        # When the restored snapshot was saved, until the first update
+        self.restored_at = None
 
         super().__init__(
             hass=hass,
             logger=LOGGER,
-            name=DOMAIN,
+            name=name,
             update_method=self._async_update_data,
-            update_interval=timedelta(
-                seconds=int(entry.data.get(POLL_INTERVAL))),
+            update_interval=self._poll_interval,
+            # Unchanged data does not notify the entities
+            always_update=False,
         )
 
-    @property
-    def tranfile(self):
-        """Get tranfile."""
-        return self._tranfile
+    def _adjust_update_interval(self) -> None:
+        """Poll less often while the endpoints are unavailable."""
+        # Next poll when the circuit breaker probes the service again
+        retry_after = timedelta(seconds=self.client.retry_after(self.endpoints))
+        self.update_interval = max(self._poll_interval, retry_after)
 
-    # 93 bug fix
-    async def async_initialize(self):
-        """Async load the translation file."""
-        self._tranfile = await self.get_tran_file()
+    @callback
+    def async_update_listeners(self) -> None:
+        """Update the listeners whose value or availability changed."""
+        if self._notified_success != self.last_update_success or self.data is None:
+            # Every entity must follow its availability
+            self._notified_success = self.last_update_success
+            super().async_update_listeners()
+            return
+        # Changed mask of the snapshot
+        for update_callback, context in list(self._listeners.values()):
+            if context is None or self.data.has_changed(*context):
+                update_callback()
 
-    # 93 bug fix
-    async def get_tran_file(self):
-        """Async get translation file for wupws sensor friendly_name."""
-        tfiledir = f'custom_components/{DOMAIN}/{DOMAIN}_translations/'
-        tfilename = self._lang.split('-', 1)[0]
-        filepath = f'{tfiledir}{tfilename}.json'
-        fallback_filepath = f'{tfiledir}en.json'
-
-        def load_json(path):
-            try:
-                return json.load_json(path)
-            except Exception:
-                return None
-
-        tfiledata = await self.hass.async_add_executor_job(load_json, filepath)
-        if tfiledata is None:
-            tfiledata = await self.hass.async_add_executor_job(load_json, fallback_filepath)
-            LOGGER.warning(
-                'Sensor translation file %s.json does not exist. Defaulting to en-US.',
-                tfilename
-            )
-        return tfiledata
+    async def _async_fetch_data(self) -> None:
+        """Fetch the endpoints of the coordinator."""
+        raise NotImplementedError
 
     async def _async_update_data(self):
         """Update data via library."""
         try:
-            await self.client.async_get_data()
-            data = {
-                "gateway_firmware_version": self.client.gateway_firmware_version,
-                "realtime_consumption": self.client.realtime_conso,
-                "grid_consumption": self.client.kwh,
-                "hc_grid_consumption": self.client.kwh_hc_ns,
-                "hp_grid_consumption": self.client.kwh_hp_ns,
-                "blue_hc_grid_consumption": self.client.tempo_hc_blue,
-                "blue_hp_grid_consumption": self.client.tempo_hp_blue,
-                "white_hc_grid_consumption": self.client.tempo_hc_white,
-                "white_hp_grid_consumption": self.client.tempo_hp_white,
-                "red_hc_grid_consumption": self.client.tempo_hc_red,
-                "red_hp_grid_consumption": self.client.tempo_hp_red,
-                "production_surplus": self.client.kwh_prod,
-                "indoor_temp": self.client.indoor_temp,
-                "outdoor_temp": self.client.outdoor_temp,
-                "indoor_hum": self.client.indoor_hum,
-                "outdoor_hum": self.client.outdoor_hum,
-            }
+            await self._async_fetch_data()
+            if not self.client.gateways:
+                raise UpdateFailed("No Ecojoko gateway found")
+            # The snapshot of the client is published as is
+            data = self.client.snapshot.since(self.data)
             self.data = data
+            if self.restored_at is not None:
+                # Every entity drops the age of the restored snapshot
+                self.restored_at = None
+                self._notified_success = None
             return data
         except LittleMonkeyApiClientAuthenticationError as exception:
             # LOGGER.error("COORDINATOR API client authentication error: %s", exception)
@@ -118,6 +120,173 @@ class LittleMonkeyDataUpdateCoordinator(DataUpdateCoordinator):
         except LittleMonkeyApiClientError as exception:
             # LOGGER.error("COORDINATOR API client error: %s", exception)
             raise UpdateFailed(exception) from exception
+        except UpdateFailed:
+            raise
         except Exception as exception:  # pylint: disable=broad-except
             # LOGGER.error("COORDINATOR other error: %s", exception)
             raise UpdateFailed(exception) from exception
+        finally:
+            self._adjust_update_interval()
+
+
+class LittleMonkeyStatisticsUpdateCoordinator(LittleMonkeyBaseUpdateCoordinator):
+    """Class to manage fetching the statistics from the Ecojoko APIs."""
+
+    endpoints = ("powerstat", "tempstat", "humstat")
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        entry: ConfigEntry,
+        client: LittleMonkeyApiClient,
+    ) -> None:
+        """Initialize."""
+        super().__init__(
+            hass=hass,
+            entry=entry,
+            client=client,
+            name=f"{DOMAIN} statistics",
+            # The scheduler decides which endpoints are due
+            poll_interval=timedelta(seconds=CONF_API_STAT_POLL_INTERVAL),
+        )
+        # Statistics are published when they land
+        client.set_update_callback(self._async_publish_statistics)
+
+    @callback
+    def _async_publish_statistics(self) -> None:
+        """Publish a statistics endpoint without waiting for the others."""
+        if self.data is None:
+            # Still in the first refresh, which waits for them
+            return
+        self.data = self.client.snapshot.since(self.data)
+        self.async_update_listeners()
+
+    async def _async_fetch_data(self) -> None:
+        """Fetch the due statistics."""
+        await self.client.async_get_statistics()
+
+
+class LittleMonkeyDataUpdateCoordinator(LittleMonkeyBaseUpdateCoordinator):
+    """Class to manage fetching the realtime data from the Ecojoko APIs."""
+
+    endpoints = ("realtime_conso",)
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        entry: ConfigEntry,
+        client: LittleMonkeyApiClient,
+        store: LittleMonkeyStore | None = None,
+    ) -> None:
+        """Initialize."""
+        self._lang = entry.options[CONF_LANG]
+        # Last good snapshot, saved at most every CONF_SNAPSHOT_SAVE_INTERVAL
+        self._store = store
+        self._snapshot_saved = None
+        # 93 bug fix
+        self._tranfile = None
+        self._rediscovery_task = None
+        super().__init__(
+            hass=hass,
+            entry=entry,
+            client=client,
+            name=DOMAIN,
+            poll_interval=timedelta(seconds=int(entry.data.get(POLL_INTERVAL))),
+        )
+        # Statistics are polled on their own, they never delay realtime
+        self.statistics = LittleMonkeyStatisticsUpdateCoordinator(hass, entry, client)
+        # Realtime samples kept on disk, out of the recorder
+        self.samples: LittleMonkeySamples | None = None
+        if entry.data.get(CONF_USE_SAMPLES_FEATURE) is True:
+            self.samples = LittleMonkeySamples(
+                hass, samples_directory(hass, entry), CONF_SAMPLES_CAPACITY)
+            client.set_sample_callback(self.samples.record)
+
+    @property
+    def tranfile(self):
+        """Get tranfile."""
+        return self._tranfile
+
+    # 93 bug fix
+    async def async_initialize(self):
+        """Async load the translation file."""
+        # Shared by the entries of the same language
+        self._tranfile = await async_get_translations(self.hass, self._lang)
+
+    @callback
+    def async_restore(self) -> bool:
+        """Publish the snapshot saved before a restart, False if there is none."""
+        if self._store is None:
+            return False
+        saved = self._store.get_snapshot(self.client.store_key, self.config_entry.entry_id)
+        if saved is None or not saved["data"].get("gateways"):
+            return False
+        self.client.restore_snapshot(saved["data"]["gateways"], {
+            device_id: DeviceReading.from_dict(values)
+            for device_id, values in saved["data"]["readings"].items()
+        })
+        restored_at = dt_util.utc_from_timestamp(saved["updated"])
+        for coordinator in (self, self.statistics):
+            coordinator.data = self.client.snapshot.since(None)
+            coordinator.restored_at = restored_at
+        return True
+
+    async def async_revalidate(self) -> None:
+        """Refresh the restored snapshot from the Ecojoko APIs."""
+        await self.async_refresh()
+        await self.statistics.async_refresh()
+
+    @callback
+    def _async_save_snapshot(self) -> None:
+        """Save the readings, unless they were saved recently."""
+        now = time.monotonic()
+        if self._store is None or (self._snapshot_saved is not None and
+                                   now - self._snapshot_saved < CONF_SNAPSHOT_SAVE_INTERVAL):
+            return
+        # Not before the statistics were fetched
+        if self.statistics.data is None or self.statistics.restored_at is not None:
+            return
+        self._snapshot_saved = now
+        self._store.set_snapshot(
+            self.client.store_key, self.config_entry.entry_id, self.client.snapshot_as_dict())
+
+    async def _async_update_data(self):
+        """Update data via library, and save the last good snapshot."""
+        data = await super()._async_update_data()
+        self._async_save_snapshot()
+        return data
+
+    async def _async_rediscover_topology(self):
+        """Rediscover the gateway topology without blocking the polls."""
+        try:
+            changes = await self.client.async_rediscover_topology()
+        except LittleMonkeyApiClientError as exception:
+            LOGGER.debug("Topology rediscovery failed: %s", exception)
+            return
+        finally:
+            self._rediscovery_task = None
+        if not self._async_handle_topology_changes(changes) and changes:
+            await self.async_request_refresh()
+
+    def _async_handle_topology_changes(self, changes: set[str]) -> bool:
+        """Reload the entry when devices appeared or disappeared."""
+        if changes:
+            LOGGER.info("Ecojoko topology changed: %s", ", ".join(sorted(changes)))
+        if "devices" not in changes:
+            return False
+        # Entities are created from the topology
+        self.hass.async_create_task(
+            self.hass.config_entries.async_reload(self.config_entry.entry_id))
+        return True
+
+    async def _async_fetch_data(self) -> None:
+        """Fetch the realtime consumption and follow the topology."""
+        await self.client.async_get_realtime_data()
+        # The topology may have been rediscovered by another entry of the account
+        self._async_handle_topology_changes(self.client.pop_topology_changes())
+        if self.client.topology_expired and self._rediscovery_task is None:
+            self._rediscovery_task = self.config_entry.async_create_background_task(
+                self.hass,
+                self._async_rediscover_topology(),
+                f"{DOMAIN} topology rediscovery",
+            )
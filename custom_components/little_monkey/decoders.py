@@ -0,0 +1,153 @@
+"""Decoders of the Ecojoko payloads for little_monkey."""
+from __future__ import annotations
+
+from dataclasses import dataclass
+import json
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+
+class PayloadError(ValueError):
+    """Exception to indicate a payload not matching its expected shape."""
+
+
+@dataclass(frozen=True, slots=True)
+class PowerstatEntry:
+    """Energy of a power meter over a period."""
+
+    kwh: float | None
+    kwh_prod: float | None = None
+    # (label, kwh) of every tariff period
+    subconsumption: tuple[tuple[str, float], ...] | None = None
+
+
+@dataclass(frozen=True, slots=True)
+class StatSample:
+    """Indoor and outdoor value of a temperature or humidity sample."""
+
+    value: float | None
+    ext_value: float | None
+
+
+def loads(body: bytes):
+    """Decode a JSON payload, with orjson when available."""
+    try:
+        if orjson is not None:
+            return orjson.loads(body)
+        return json.loads(body)
+    except ValueError as exception:
+        raise PayloadError(f"invalid JSON: {exception}") from exception
+
+
+def _get(obj, key: str, path: str, expected: type | tuple = dict):
+    """Return a member of a JSON object, checking its type."""
+    if not isinstance(obj, dict):
+        raise PayloadError(f"{path}: expected an object, got {type(obj).__name__}")
+    if key not in obj:
+        raise PayloadError(f"{path}.{key}: missing")
+    value = obj[key]
+    if not isinstance(value, expected):
+        names = expected if isinstance(expected, tuple) else (expected,)
+        raise PayloadError(
+            f"{path}.{key}: expected {' or '.join(name.__name__ for name in names)}, "
+            f"got {type(value).__name__}")
+    return value
+
+
+def _number(value, path: str, optional: bool = False) -> float | None:
+    """Return a JSON number as a float, numeric strings included."""
+    if value is None and optional:
+        return None
+    if isinstance(value, int | float) and not isinstance(value, bool):
+        return float(value)
+    if isinstance(value, str):
+        try:
+            return float(value)
+        except ValueError:
+            pass
+    raise PayloadError(f"{path}: expected a number, got {value!r}")
+
+
+def decode_login(cookies: dict[str, str]) -> dict[str, str]:
+    """Check that a login answer opened a session."""
+    if not cookies:
+        raise PayloadError("login: no session cookie")
+    return cookies
+
+
+def decode_gateways(body: bytes) -> list[dict]:
+    """Decode the gateways payload into the gateway topology."""
+    gateways = []
+    for index, gateway in enumerate(_get(loads(body), 'gateways', "$", list)):
+        path = f"$.gateways[{index}]"
+        devices = gateway.get('devices') if isinstance(gateway, dict) else None
+        if devices is None:
+            devices = []
+        elif not isinstance(devices, list):
+            raise PayloadError(f"{path}.devices: expected list, got {type(devices).__name__}")
+        power_meter_ids = []
+        temp_hum_ids = []
+        for device_index, device in enumerate(devices):
+            device_path = f"{path}.devices[{device_index}]"
+            device_type = _get(device, 'device_type', device_path, str)
+            if device_type == "POWER_METER":
+                power_meter_ids.append(_get(device, 'device_id', device_path, (str, int)))
+            elif device_type == "TEMP_HUM":
+                temp_hum_ids.append(_get(device, 'device_id', device_path, (str, int)))
+        gateways.append({
+            # Looking for gateway Id
+            "gateway_id": _get(gateway, 'gateway_id', path, (str, int)),
+            # Looking for gateway firmware
+            "gateway_firmware_version": gateway.get('gateway_firmware_version'),
+            # Looking for humidity temperature and power meter devices id
+            "power_meter_ids": power_meter_ids,
+            "temp_hum_ids": temp_hum_ids,
+        })
+    return gateways
+
+
+def decode_realtime_conso(body: bytes) -> float:
+    """Decode the realtime consumption payload, in W."""
+    real_time = _get(loads(body), 'real_time', "$")
+    return _number(_get(real_time, 'value', "$.real_time", object), "$.real_time.value")
+
+
+def _stat_data(body: bytes) -> list:
+    """Return the data of a statistics payload."""
+    return _get(_get(loads(body), 'stat', "$"), 'data', "$.stat", list)
+
+
+def decode_powerstat(body: bytes) -> list[PowerstatEntry]:
+    """Decode the power statistics payload into one entry per period."""
+    entries = []
+    for index, item in enumerate(_stat_data(body)):
+        path = f"$.stat.data[{index}]"
+        # Days still to come in the week have no energy
+        kwh = _number(_get(item, 'kwh', path, object), f"{path}.kwh", optional=True)
+        kwh_prod = _number(item.get('kwh_prod'), f"{path}.kwh_prod", optional=True)
+        subconsumption = None
+        if 'subconsumption' in item:
+            subconsumption = tuple(
+                (_get(sub, 'label', f"{path}.subconsumption[{sub_index}]", str),
+                 _number(_get(sub, 'kwh', f"{path}.subconsumption[{sub_index}]", object),
+                         f"{path}.subconsumption[{sub_index}].kwh", optional=True) or 0.0)
+                for sub_index, sub in enumerate(
+                    _get(item, 'subconsumption', path, list))
+            )
+        entries.append(PowerstatEntry(kwh, kwh_prod, subconsumption))
+    return entries
+
+
+def decode_stat(body: bytes) -> list[StatSample]:
+    """Decode a temperature or humidity statistics payload."""
+    samples = []
+    for index, item in enumerate(_stat_data(body)):
+        path = f"$.stat.data[{index}]"
+        samples.append(StatSample(
+            _number(_get(item, 'value', path, object), f"{path}.value", optional=True),
+            _number(item.get('ext_value'), f"{path}.ext_value", optional=True),
+        ))
+    return samples
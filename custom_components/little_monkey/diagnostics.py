@@ -0,0 +1,43 @@
+"""Diagnostics support for little_monkey."""
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import CONF_PASSWORD, CONF_USERNAME
+from homeassistant.core import HomeAssistant
+
+from .const import DOMAIN
+
+TO_REDACT = {CONF_USERNAME, CONF_PASSWORD}
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> dict[str, Any]:
+    """Return diagnostics for a config entry."""
+    coordinator = hass.data[DOMAIN][entry.entry_id]
+    client = coordinator.client
+    return {
+        "entry": {
+            "data": async_redact_data(entry.data, TO_REDACT),
+            "options": async_redact_data(entry.options, TO_REDACT),
+        },
+        "update_interval": coordinator.update_interval.total_seconds(),
+        "last_update_success": coordinator.last_update_success,
+        "gateways": client.gateways,
+        "metrics": client.metrics.as_dict(),
+        "breakers": {
+            endpoint: breaker.state.name.lower()
+            for endpoint, breaker in client.breakers.items()
+        },
+        "loop_block": client.loop_block,
+        "data": coordinator.data.as_dict(),
+        "statistics": {
+            "update_interval": coordinator.statistics.update_interval.total_seconds(),
+            "last_update_success": coordinator.statistics.last_update_success,
+            "data": coordinator.statistics.data.as_dict()
+            if coordinator.statistics.data is not None else None,
+        },
+    }
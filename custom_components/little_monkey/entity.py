@@ -1,51 +1,69 @@
 """LittleMonkeyEntity class."""
 from __future__ import annotations
 
-from homeassistant.helpers.entity import DeviceInfo
+from operator import attrgetter
+
+from homeassistant.core import callback
+from homeassistant.helpers import device_registry as dr
+from homeassistant.helpers.entity import DeviceInfo, EntityCategory
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
-from homeassistant.components.sensor import SensorEntity
+from homeassistant.components.sensor import (
+    RestoreSensor,
+    SensorDeviceClass,
+    SensorEntity,
+    SensorEntityDescription,
+    SensorStateClass,
+)
+from homeassistant.const import UnitOfTime
+
+from .const import ATTR_RESTORED_FROM, ATTRIBUTION, DOMAIN, MANUFACTURER, MODEL, VERSION, SENSOR_ENDPOINTS
+from .utils import get_current_date, get_paris_timezone
 
-from .const import ATTRIBUTION, DOMAIN, MANUFACTURER, MODEL, VERSION
+TZ = get_paris_timezone()
 
 class EcojokoEntity(CoordinatorEntity):
     """EcojokoEntity class."""
 
     _attr_attribution = ATTRIBUTION
 
-    def __init__(self, coordinator, device_name, firmware_version):
+    def __init__(self, coordinator, device_name, firmware_version, device_id):
         """Initialize the main device entity."""
         super().__init__(coordinator)
         self._device_name = device_name
         self._firmware_version = firmware_version
+        # Any device of the gateway, its values hold the gateway firmware
+        self._device_id = device_id
         self._child_entities = []
-
-    @property
-    def name(self):
-        """Return the name of the Ecojoko device entity."""
-        return f"{self._device_name}"
-
-    @property
-    def unique_id(self):
-        """Return a unique ID for the Ecojoko device entity."""
-        return f"{DOMAIN}_{self._device_name}"
-        # return f"{DOMAIN}_main_device_{self._device_name}"
-
-    @property
-    def state(self):
-        """Return the state of the main device."""
-        return self._firmware_version
-
-    @property
-    def device_info(self) -> DeviceInfo:
-        """Return device information for the main device."""
-        return {
-            "identifiers": {(DOMAIN, self.unique_id)},
-            "name": self.name,
-            "manufacturer": MANUFACTURER,
-            "model": MODEL,
-            "sw_version": VERSION,
-            "hw_version": self._firmware_version,
-        }
+        # Static attributes are set once
+        self._attr_name = f"{device_name}"
+        self._attr_unique_id = f"{DOMAIN}_{device_name}"
+        # self._attr_unique_id = f"{DOMAIN}_main_device_{device_name}"
+        self._set_firmware_version(firmware_version)
+
+    def _set_firmware_version(self, firmware_version):
+        """Set the state and the device information of the main device."""
+        self._firmware_version = firmware_version
+        self._attr_state = firmware_version
+        self._attr_device_info = DeviceInfo(
+            identifiers={(DOMAIN, self._attr_unique_id)},
+            name=self._attr_name,
+            manufacturer=MANUFACTURER,
+            model=MODEL,
+            sw_version=VERSION,
+            hw_version=firmware_version,
+        )
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Follow a gateway firmware upgrade."""
+        reading = self.coordinator.data.get(self._device_id)
+        firmware_version = reading.gateway_firmware_version if reading is not None else None
+        if firmware_version is not None and firmware_version != self._firmware_version:
+            self._set_firmware_version(firmware_version)
+            if self.registry_entry is not None and self.registry_entry.device_id is not None:
+                dr.async_get(self.hass).async_update_device(
+                    self.registry_entry.device_id, hw_version=firmware_version)
+        super()._handle_coordinator_update()
 
     @property
     def child_entities(self):
@@ -59,52 +77,61 @@ class EcojokoEntity(CoordinatorEntity):
 class EcojokoSensor(CoordinatorEntity, SensorEntity):
     """Representation of a my_device sensor."""
 
-    def __init__(self, main_device, sensor_name, state_class, device_class, unit_of_measurement, icon):
+    _attr_has_entity_name = True
+
+    def __init__(self, main_device, description: SensorEntityDescription,
+                 device_id, device_index=0, historical=True):
         """Initialize the sensor."""
-        super().__init__(main_device.coordinator)
+        sensor_name = description.key
+        # Statistics sensors follow the statistics coordinator
+        endpoint = SENSOR_ENDPOINTS[sensor_name]
+        coordinator = main_device.coordinator
+        if endpoint not in coordinator.endpoints:
+            coordinator = coordinator.statistics
+        # Notified only when its value changed
+        super().__init__(coordinator, context=(device_id, sensor_name))
+        # Static metadata lives in the description and the attributes
+        self.entity_description = description
+        # Typed readings
+        self._get_value = attrgetter(sensor_name)
         self._main_device = main_device
         self._sensor_name = sensor_name
-        self._state_class = state_class
-        self._device_class = device_class
-        self._unit_of_measurement = unit_of_measurement
-        self._icon = icon
+        self._device_id = device_id
         self._attr_translation_key = sensor_name
-        self._attr_has_entity_name = True
-
-    @property
-    def name(self):
-        """Return the name of the sensor."""
-        return f"{self._main_device.name} - {self._main_device.coordinator.tranfile[self._sensor_name]}"
-
-    @property
-    def unique_id(self):
-        """Return a unique ID for the sensor."""
-        return f"{self._main_device.unique_id}_{self._sensor_name}"
-
-    @property
-    def state(self):
-        """Return the state of the sensor."""
-        return self.coordinator.data.get(self._sensor_name)
-
-    @property
-    def state_class(self):
-        """Return the state class of the sensor."""
-        return self._state_class
-
-    @property
-    def device_class(self):
-        """Return the device class of the sensor."""
-        return self._device_class
-
-    @property
-    def unit_of_measurement(self):
-        """Return the unit of measurement."""
-        return self._unit_of_measurement
-
-    @property
-    def icon(self):
-        """Return the icon of the sensor."""
-        return self._icon
+        # Names are computed once
+        name = f"{main_device.name} - {main_device.coordinator.tranfile[sensor_name]}"
+        # The device the single-device versions followed keeps the historical ids
+        if not historical:
+            name = f"{name} {device_index + 1}"
+            self._attr_unique_id = f"{main_device.unique_id}_{device_id}_{sensor_name}"
+        else:
+            self._attr_unique_id = f"{main_device.unique_id}_{sensor_name}"
+        self._attr_name = name
+        self._attr_native_value = self._get_native_value()
+        self._attr_extra_state_attributes = self._get_restored_attributes()
+
+    def _get_native_value(self):
+        """Return the value of the sensor in the latest readings."""
+        if self.coordinator.data is None:
+            return None
+        reading = self.coordinator.data.get(self._device_id)
+        if reading is None:
+            return None
+        return self._get_value(reading)
+
+    def _get_restored_attributes(self):
+        """Return when the restored value was saved, until it is refreshed."""
+        # Values published before the first update come from the last snapshot
+        if self.coordinator.restored_at is None:
+            return None
+        return {ATTR_RESTORED_FROM: self.coordinator.restored_at.isoformat()}
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Recompute the value of the sensor and the age of a restored value."""
+        self._attr_native_value = self._get_native_value()
+        self._attr_extra_state_attributes = self._get_restored_attributes()
+        super()._handle_coordinator_update()
 
     @property
     def device_state_attributes(self):
@@ -119,3 +146,65 @@ class EcojokoSensor(CoordinatorEntity, SensorEntity):
     #     # Add code here to update sensor data (e.g., read temperature from the device)
     #     # For simplicity, we'll set a dummy value
     #     self.coordinator.data[self._sensor_name] = 27.0  # Replace with actual sensor data
+
+
+class EcojokoEstimateSensor(EcojokoSensor, RestoreSensor):
+    """Energy of the day estimated between two power statistics."""
+
+    async def async_added_to_hass(self) -> None:
+        """Resume the estimate published before a restart on the same day."""
+        await super().async_added_to_hass()
+        # The estimate must not decrease when restarting from the statistics
+        last_state = await self.async_get_last_state()
+        last_data = await self.async_get_last_sensor_data()
+        if last_state is None or last_data is None or last_data.native_value is None:
+            return
+        if last_state.last_updated.astimezone(TZ).date() != get_current_date(TZ):
+            return
+        try:
+            kwh = float(last_data.native_value)
+        except (TypeError, ValueError):
+            return
+        self.coordinator.client.restore_estimate(self._device_id, kwh)
+
+
+class EcojokoDiagnosticSensor(CoordinatorEntity, SensorEntity):
+    """Call statistics of an Ecojoko endpoint, disabled by default."""
+
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_entity_registry_enabled_default = False
+
+    def __init__(self, main_device, sensor_name, endpoint):
+        """Initialize the sensor."""
+        super().__init__(main_device.coordinator)
+        self._main_device = main_device
+        self._sensor_name = sensor_name
+        self._endpoint = endpoint
+        if sensor_name == "api_latency":
+            self._attr_state_class = SensorStateClass.MEASUREMENT
+            self._attr_device_class = SensorDeviceClass.DURATION
+            self._attr_native_unit_of_measurement = UnitOfTime.MILLISECONDS
+            self._attr_icon = "mdi:timer-outline"
+        else:
+            self._attr_state_class = SensorStateClass.TOTAL_INCREASING
+            self._attr_icon = "mdi:alert-circle-outline"
+        self._attr_name = f"{main_device.name} - " \
+            f"{main_device.coordinator.tranfile[sensor_name]} {endpoint}"
+        self._attr_unique_id = f"{main_device.unique_id}_{sensor_name}_{endpoint}"
+        self._update_statistics()
+
+    def _update_statistics(self) -> None:
+        """Compute the statistic of the endpoint and its details."""
+        metrics = self.coordinator.client.metrics.endpoint(self._endpoint)
+        if self._sensor_name == "api_latency":
+            latency = metrics.mean_latency
+            self._attr_native_value = round(latency * 1000) if latency is not None else None
+        else:
+            self._attr_native_value = metrics.error_count
+        self._attr_extra_state_attributes = metrics.as_dict()
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Recompute the statistic of the endpoint."""
+        self._update_statistics()
+        super()._handle_coordinator_update()
@@ -0,0 +1,68 @@
+"""Energy estimate between two power statistics for little_monkey."""
+from __future__ import annotations
+
+import datetime
+
+
+class EnergyIntegrator:
+    """Integrate the realtime power of a power meter on top of its last daily energy.
+
+    The trapezoidal integral of the realtime samples is added to the energy of
+    the day last given by the power statistics, which re-anchor the estimate
+    whenever they refresh. The estimate never decreases within a day, an
+    anchor below it holds it until the energy of the day catches up.
+    """
+
+    def __init__(self, max_gap: float) -> None:
+        """Initialize."""
+        # Seconds above which two samples are not integrated together
+        self._max_gap = max_gap
+        self._date: datetime.date | None = None
+        self._anchor: float | None = None
+        self._integral = 0.0
+        self._floor = 0.0
+        self._sample: tuple[float, float] | None = None
+
+    @property
+    def estimate(self) -> float | None:
+        """Return the estimated energy of the day, in kWh, None until anchored."""
+        if self._anchor is None:
+            return None
+        self._floor = max(self._floor, self._anchor + self._integral)
+        return round(self._floor, 3)
+
+    def _roll(self, current_date: datetime.date) -> None:
+        """Start the energy of a new day from zero."""
+        if current_date != self._date:
+            if self._date is not None:
+                self._anchor = 0.0
+            self._date = current_date
+            self._integral = 0.0
+            self._floor = 0.0
+
+    def restore(self, kwh: float, current_date: datetime.date) -> None:
+        """Resume from the estimate published before a restart on the same day."""
+        self._roll(current_date)
+        self._floor = max(self._floor, kwh)
+
+    def add_sample(self, watts: float, timestamp: float,
+                   current_date: datetime.date) -> None:
+        """Integrate a realtime power sample, timestamp in seconds."""
+        self._roll(current_date)
+        previous = self._sample
+        self._sample = (timestamp, watts)
+        if previous is None:
+            return
+        elapsed = timestamp - previous[0]
+        # A gap, such as a restart or an outage, is left to the next anchor
+        if elapsed <= 0 or elapsed > self._max_gap:
+            return
+        self._integral += (previous[1] + watts) / 2 * elapsed / 3600000
+
+    def anchor(self, kwh: float | None, current_date: datetime.date) -> None:
+        """Restart the estimate from the authoritative energy of the day."""
+        if kwh is None:
+            return
+        self._roll(current_date)
+        self._anchor = kwh
+        self._integral = 0.0
@@ -0,0 +1,140 @@
+"""Call instrumentation for little_monkey APIs."""
+from __future__ import annotations
+
+import asyncio
+from collections import deque
+from contextlib import contextmanager
+import time
+
+# Upper bounds of the latency histogram buckets, in seconds
+LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1, 2, 3)
+# Latest calls kept for the rolling statistics
+LATENCY_WINDOW = 200
+
+
+class CallSample:
+    """What a measured call reports before it ends."""
+
+    def __init__(self) -> None:
+        """Initialize."""
+        self.size = 0
+        self.cache_hit = None
+
+
+class EndpointMetrics:
+    """Rolling statistics of the calls of an endpoint."""
+
+    def __init__(self) -> None:
+        """Initialize."""
+        self.calls = 0
+        self.bytes = 0
+        self.errors: dict[str, int] = {}
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.shared_calls = 0
+        self._latencies: deque[float] = deque(maxlen=LATENCY_WINDOW)
+
+    @property
+    def error_count(self) -> int:
+        """Return the number of failed calls."""
+        return sum(self.errors.values())
+
+    @property
+    def mean_latency(self) -> float | None:
+        """Return the mean latency of the latest calls, in seconds."""
+        if not self._latencies:
+            return None
+        return sum(self._latencies) / len(self._latencies)
+
+    def record(self, latency: float, sample: CallSample) -> None:
+        """Record a successful call."""
+        self.calls += 1
+        self.bytes += sample.size
+        self._latencies.append(latency)
+        if sample.cache_hit is True:
+            self.cache_hits += 1
+        elif sample.cache_hit is False:
+            self.cache_misses += 1
+
+    def percentile(self, fraction: float, min_samples: int = 1) -> float | None:
+        """Return a percentile of the latest latencies, in seconds."""
+        if len(self._latencies) < max(min_samples, 1):
+            return None
+        latencies = sorted(self._latencies)
+        return latencies[min(int(len(latencies) * fraction), len(latencies) - 1)]
+
+    def record_error(self, latency: float, kind: str) -> None:
+        """Record a failed call."""
+        self.calls += 1
+        self.errors[kind] = self.errors.get(kind, 0) + 1
+        # A timed out call lasted at least that long, a fast failure tells nothing
+        if kind == "timeout":
+            self._latencies.append(latency)
+
+    def as_dict(self) -> dict:
+        """Return the statistics of the endpoint."""
+        latencies = sorted(self._latencies)
+        histogram = {f"le_{bound}": 0 for bound in LATENCY_BUCKETS}
+        histogram["le_inf"] = 0
+        for latency in latencies:
+            bucket = next((f"le_{bound}" for bound in LATENCY_BUCKETS if latency <= bound),
+                          "le_inf")
+            histogram[bucket] += 1
+        return {
+            "calls": self.calls,
+            "bytes": self.bytes,
+            "errors": dict(self.errors),
+            "cache_hits": self.cache_hits,
+            "cache_misses": self.cache_misses,
+            "shared_calls": self.shared_calls,
+            "latency": {
+                "mean": self.mean_latency,
+                "p50": self.percentile(0.5),
+                "p95": self.percentile(0.95),
+                "max": latencies[-1] if latencies else None,
+                "histogram": histogram,
+            },
+        }
+
+
+def _error_kind(exception: BaseException) -> str:
+    """Return the kind of error that made a call fail."""
+    if isinstance(exception, asyncio.TimeoutError) or \
+            isinstance(exception.__cause__, asyncio.TimeoutError):
+        return "timeout"
+    return type(exception).__name__
+
+
+class ApiMetrics:
+    """Statistics of the calls made for an account, per endpoint."""
+
+    def __init__(self) -> None:
+        """Initialize."""
+        self._endpoints: dict[str, EndpointMetrics] = {}
+
+    def endpoint(self, endpoint: str) -> EndpointMetrics:
+        """Return the statistics of an endpoint."""
+        metrics = self._endpoints.get(endpoint)
+        if metrics is None:
+            metrics = self._endpoints[endpoint] = EndpointMetrics()
+        return metrics
+
+    @contextmanager
+    def measure(self, endpoint: str):
+        """Measure the call made inside the block."""
+        sample = CallSample()
+        started = time.monotonic()
+        try:
+            yield sample
+        except Exception as exception:
+            self.endpoint(endpoint).record_error(
+                time.monotonic() - started, _error_kind(exception))
+            raise
+        self.endpoint(endpoint).record(time.monotonic() - started, sample)
+
+    def as_dict(self) -> dict:
+        """Return the statistics of every endpoint."""
+        return {
+            endpoint: metrics.as_dict()
+            for endpoint, metrics in self._endpoints.items()
+        }
@@ -0,0 +1,100 @@
+"""Readings of the Ecojoko devices for little_monkey."""
+from __future__ import annotations
+
+from dataclasses import dataclass, field, fields, replace
+
+
+@dataclass(frozen=True, slots=True)
+class DeviceReading:
+    """Latest values of an Ecojoko device."""
+
+    gateway_firmware_version: str | None = None
+    realtime_consumption: float | None = None
+    grid_consumption: float | None = None
+    estimated_grid_consumption: float | None = None
+    hc_grid_consumption: float | None = None
+    hp_grid_consumption: float | None = None
+    blue_hc_grid_consumption: float | None = None
+    blue_hp_grid_consumption: float | None = None
+    white_hc_grid_consumption: float | None = None
+    white_hp_grid_consumption: float | None = None
+    red_hc_grid_consumption: float | None = None
+    red_hp_grid_consumption: float | None = None
+    production_surplus: float | None = None
+    indoor_temp: float | None = None
+    outdoor_temp: float | None = None
+    indoor_hum: float | None = None
+    outdoor_hum: float | None = None
+
+    def update(self, values: dict) -> DeviceReading:
+        """Return the reading with new values, itself if none changed."""
+        changes = {
+            name: value for name, value in values.items()
+            if getattr(self, name) != value
+        }
+        if not changes:
+            return self
+        return replace(self, **changes)
+
+    def diff(self, other: DeviceReading | None) -> int:
+        """Return the mask of the fields that differ from another reading."""
+        if other is None:
+            return ALL_FIELDS_MASK
+        mask = 0
+        for name, bit in FIELD_MASKS.items():
+            if getattr(self, name) != getattr(other, name):
+                mask |= bit
+        return mask
+
+    def as_dict(self) -> dict:
+        """Return the values of the reading."""
+        return {name: getattr(self, name) for name in FIELD_MASKS}
+
+    @classmethod
+    def from_dict(cls, values: dict) -> DeviceReading:
+        """Return the reading of values, ignoring the unknown ones."""
+        return cls(**{name: value for name, value in values.items() if name in FIELD_MASKS})
+
+
+# One bit per field of a reading, in the changed masks
+FIELD_MASKS = {
+    reading_field.name: 1 << index
+    for index, reading_field in enumerate(fields(DeviceReading))
+}
+ALL_FIELDS_MASK = (1 << len(FIELD_MASKS)) - 1
+
+
+@dataclass(frozen=True, slots=True)
+class Snapshot:
+    """Readings of every device, and the fields changed since the previous snapshot."""
+
+    readings: dict[str, DeviceReading] = field(default_factory=dict)
+    changed: dict[str, int] = field(default_factory=dict, compare=False)
+
+    def get(self, device_id: str) -> DeviceReading | None:
+        """Return the reading of a device."""
+        return self.readings.get(device_id)
+
+    def has_changed(self, device_id: str, name: str) -> bool:
+        """Return True if a field of a device changed since the previous snapshot."""
+        return bool(self.changed.get(device_id, 0) & FIELD_MASKS[name])
+
+    def since(self, previous: Snapshot | None) -> Snapshot:
+        """Return the snapshot with the fields changed since a previous one."""
+        if previous is None:
+            return Snapshot(self.readings, dict.fromkeys(self.readings, ALL_FIELDS_MASK))
+        if previous.readings is self.readings:
+            return Snapshot(self.readings)
+        changed = {}
+        for device_id, reading in self.readings.items():
+            previous_reading = previous.readings.get(device_id)
+            if reading is not previous_reading:
+                changed[device_id] = reading.diff(previous_reading)
+        return Snapshot(self.readings, changed)
+
+    def as_dict(self) -> dict:
+        """Return the values of every device."""
+        return {
+            device_id: reading.as_dict()
+            for device_id, reading in self.readings.items()
+        }
@@ -0,0 +1,187 @@
+"""High-resolution history of the realtime consumption for little_monkey."""
+from __future__ import annotations
+
+from array import array
+from bisect import bisect_left, bisect_right
+import mmap
+import os
+from pathlib import Path
+import struct
+import threading
+
+from homeassistant.core import HomeAssistant, callback
+
+from .const import LOGGER
+
+# Magic, version, capacity, samples appended since creation
+_HEADER = struct.Struct("<4sIIQ")
+_HEADER_SIZE = 64
+_MAGIC = b"LMRB"
+_VERSION = 1
+
+
+class _Timestamps:
+    """Timestamps of a ring buffer, oldest first, for the bisect functions."""
+
+    def __init__(self, ring: SampleRingBuffer) -> None:
+        """Initialize."""
+        self._ring = ring
+
+    def __len__(self) -> int:
+        return self._ring.size
+
+    def __getitem__(self, index: int) -> float:
+        return self._ring.timestamps[self._ring.slot(index)]
+
+
+class SampleRingBuffer:
+    """Fixed-size ring of timestamped power samples in a memory-mapped file.
+
+    The file is preallocated with a header, then the timestamps (float64,
+    seconds since the epoch) and the watts (float32) of every slot. Appending
+    writes one slot and the header in place, the oldest sample being
+    overwritten once the ring is full.
+    """
+
+    def __init__(self, path: Path, capacity: int) -> None:
+        """Open the ring of a file, created or reset when not matching."""
+        self.capacity = capacity
+        size = _HEADER_SIZE + capacity * (8 + 4)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            header = os.pread(fd, _HEADER.size, 0)
+            if (len(header) < _HEADER.size
+                    or _HEADER.unpack(header)[:3] != (_MAGIC, _VERSION, capacity)
+                    or os.fstat(fd).st_size != size):
+                LOGGER.debug("Creating the realtime samples of %s", path)
+                os.ftruncate(fd, 0)
+                if hasattr(os, "posix_fallocate"):
+                    os.posix_fallocate(fd, 0, size)
+                else:
+                    os.ftruncate(fd, size)
+                os.pwrite(fd, _HEADER.pack(_MAGIC, _VERSION, capacity, 0), 0)
+            self._mmap = mmap.mmap(fd, size)
+        finally:
+            os.close(fd)
+        self._view = memoryview(self._mmap)
+        self.timestamps = self._view[_HEADER_SIZE:_HEADER_SIZE + capacity * 8].cast("d")
+        self.watts = self._view[_HEADER_SIZE + capacity * 8:size].cast("f")
+        self._count = _HEADER.unpack_from(self._mmap)[3]
+        # Held while a slot is written or a window copied
+        self._lock = threading.Lock()
+
+    @property
+    def size(self) -> int:
+        """Return the number of samples held."""
+        return min(self._count, self.capacity)
+
+    def slot(self, index: int) -> int:
+        """Return the slot of a held sample, 0 being the oldest."""
+        return (self._count - self.size + index) % self.capacity
+
+    def append(self, timestamp: float, watts: float) -> bool:
+        """Append a sample, False if not more recent than the last one."""
+        if self._count and timestamp <= self.timestamps[self.slot(self.size - 1)]:
+            return False
+        with self._lock:
+            slot = self._count % self.capacity
+            self.timestamps[slot] = timestamp
+            self.watts[slot] = watts
+            self._count += 1
+            _HEADER.pack_into(self._mmap, 0, _MAGIC, _VERSION, self.capacity, self._count)
+        return True
+
+    def window(self, start: float, end: float) -> tuple[array, array]:
+        """Return the timestamps and watts of the samples from start to end."""
+        with self._lock:
+            timestamps = _Timestamps(self)
+            first = bisect_left(timestamps, start)
+            last = bisect_right(timestamps, end)
+            result = (array("d"), array("f"))
+            # At most two contiguous runs of slots
+            while first < last:
+                slot = self.slot(first)
+                run = min(last - first, self.capacity - slot)
+                result[0].frombytes(self.timestamps[slot:slot + run].cast("B"))
+                result[1].frombytes(self.watts[slot:slot + run].cast("B"))
+                first += run
+            return result
+
+    def downsample(self, start: float, end: float, step: float) -> list[dict]:
+        """Return the mean, min and max of the samples of every step of a window."""
+        timestamps, watts = self.window(start, end)
+        buckets = []
+        current = None
+        for timestamp, value in zip(timestamps, watts):
+            bucket = int((timestamp - start) // step)
+            if current is None or current["bucket"] != bucket:
+                current = {"bucket": bucket, "sum": 0.0, "min": value,
+                           "max": value, "count": 0}
+                buckets.append(current)
+            current["sum"] += value
+            current["count"] += 1
+            current["min"] = min(current["min"], value)
+            current["max"] = max(current["max"], value)
+        return [
+            {
+                "start": start + bucket["bucket"] * step,
+                "mean": round(bucket["sum"] / bucket["count"], 1),
+                "min": round(bucket["min"], 1),
+                "max": round(bucket["max"], 1),
+                "count": bucket["count"],
+            }
+            for bucket in buckets
+        ]
+
+    def close(self) -> None:
+        """Write the ring back to its file and unmap it."""
+        with self._lock:
+            self.timestamps.release()
+            self.watts.release()
+            self._view.release()
+            self._mmap.flush()
+            self._mmap.close()
+
+
+class LittleMonkeySamples:
+    """Ring buffers of the realtime consumption of the power meters of an entry."""
+
+    def __init__(self, hass: HomeAssistant, directory: Path, capacity: int) -> None:
+        """Initialize."""
+        self._hass = hass
+        self._directory = directory
+        self._capacity = capacity
+        self._rings: dict[str, SampleRingBuffer] = {}
+
+    @property
+    def device_ids(self) -> list[str]:
+        """Return the power meters recorded."""
+        return list(self._rings)
+
+    async def async_open(self, device_ids: list[str]) -> None:
+        """Open the rings of power meters."""
+        for device_id in device_ids:
+            if device_id not in self._rings:
+                self._rings[device_id] = await self._hass.async_add_executor_job(
+                    SampleRingBuffer, self._directory / f"{device_id}.ring", self._capacity)
+
+    @callback
+    def record(self, device_id: str, timestamp: float, watts: float) -> None:
+        """Append a realtime sample of a power meter."""
+        if (ring := self._rings.get(device_id)) is not None:
+            ring.append(timestamp, watts)
+
+    async def async_downsample(self, device_id: str, start: float, end: float,
+                               step: float) -> list[dict]:
+        """Return the downsampled window of a power meter."""
+        if (ring := self._rings.get(device_id)) is None:
+            return []
+        return await self._hass.async_add_executor_job(
+            ring.downsample, start, end, step)
+
+    async def async_close(self) -> None:
+        """Close every ring."""
+        rings, self._rings = self._rings, {}
+        for ring in rings.values():
+            await self._hass.async_add_executor_job(ring.close)
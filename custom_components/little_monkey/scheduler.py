@@ -0,0 +1,34 @@
+"""Refresh scheduler for little_monkey statistics APIs."""
+from __future__ import annotations
+
+
+class StatScheduler:
+    """Track when each statistics endpoint of each device is due."""
+
+    def __init__(self, periods: dict[str, float]) -> None:
+        """Initialize with the refresh period of every endpoint, in seconds."""
+        self._periods = periods
+        # Endpoints are shifted in their period so that they are not all due together
+        self._offsets = {
+            endpoint: period * index / len(periods)
+            for index, (endpoint, period) in enumerate(periods.items())
+        }
+        self._deadlines: dict[tuple[str, str], float] = {}
+
+    def is_due(self, endpoint: str, device_id: str, now: float) -> bool:
+        """Return True if the endpoint of the device must be called."""
+        deadline = self._deadlines.get((endpoint, device_id))
+        return deadline is None or deadline <= now
+
+    def mark_done(self, endpoint: str, device_id: str, now: float) -> None:
+        """Schedule the next call after a successful refresh."""
+        period = self._periods[endpoint]
+        deadline = self._deadlines.get((endpoint, device_id))
+        if deadline is None:
+            # First refresh, spread the endpoints over the period
+            deadline = now + self._offsets[endpoint]
+        deadline += period
+        if deadline <= now:
+            # Late by more than a period, do not catch up with a burst
+            deadline = now + period
+        self._deadlines[(endpoint, device_id)] = deadline
@@ -2,150 +2,181 @@
 from __future__ import annotations
 
 from homeassistant.components.sensor import (
+    SensorEntityDescription,
     SensorStateClass,
     SensorDeviceClass,
 )
 from homeassistant.const import UnitOfPower, UnitOfEnergy, UnitOfTemperature, PERCENTAGE, CONF_NAME
 
-from custom_components.little_monkey.entity import EcojokoEntity, EcojokoSensor
+from custom_components.little_monkey.entity import (
+    EcojokoDiagnosticSensor,
+    EcojokoEntity,
+    EcojokoEstimateSensor,
+    EcojokoSensor,
+)
 from .const import (
     DOMAIN,
+    ENDPOINT_SENSORS,
     CONF_USE_HCHP_FEATURE,
     CONF_USE_TEMPO_FEATURE,
     CONF_USE_TEMPHUM_FEATURE,
     CONF_USE_PROD_FEATURE
 )
 
+
+def _energy(key: str) -> SensorEntityDescription:
+    """Return the description of an energy sensor."""
+    return SensorEntityDescription(
+        key=key,
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        device_class=SensorDeviceClass.ENERGY,
+        native_unit_of_measurement=UnitOfEnergy.KILO_WATT_HOUR,
+        icon="mdi:lightning-bolt",
+    )
+
+
+def _temperature(key: str) -> SensorEntityDescription:
+    """Return the description of a temperature sensor."""
+    return SensorEntityDescription(
+        key=key,
+        state_class=SensorStateClass.MEASUREMENT,
+        device_class=SensorDeviceClass.TEMPERATURE,
+        native_unit_of_measurement=UnitOfTemperature.CELSIUS,
+        icon="mdi:thermometer",
+    )
+
+
+def _humidity(key: str) -> SensorEntityDescription:
+    """Return the description of a humidity sensor."""
+    return SensorEntityDescription(
+        key=key,
+        state_class=SensorStateClass.MEASUREMENT,
+        device_class=SensorDeviceClass.HUMIDITY,
+        native_unit_of_measurement=PERCENTAGE,
+        icon="mdi:water",
+    )
+
+
+# Sensors of a power meter, by the option enabling them (None: always)
+POWER_METER_SENSORS: dict[str | None, tuple[SensorEntityDescription, ...]] = {
+    None: (
+        # Real time sensor
+        SensorEntityDescription(
+            key="realtime_consumption",
+            state_class=SensorStateClass.MEASUREMENT,
+            device_class=SensorDeviceClass.POWER,
+            native_unit_of_measurement=UnitOfPower.WATT,
+            icon="mdi:flash",
+        ),
+        # Grid consumption sensor
+        _energy("grid_consumption"),
+        # Grid consumption estimated from the realtime power, opt-in
+        SensorEntityDescription(
+            key="estimated_grid_consumption",
+            state_class=SensorStateClass.TOTAL_INCREASING,
+            device_class=SensorDeviceClass.ENERGY,
+            native_unit_of_measurement=UnitOfEnergy.KILO_WATT_HOUR,
+            icon="mdi:lightning-bolt-outline",
+            entity_registry_enabled_default=False,
+        ),
+    ),
+    # HC/HP grid consumption sensors
+    CONF_USE_HCHP_FEATURE: (
+        _energy("hc_grid_consumption"),
+        _energy("hp_grid_consumption"),
+    ),
+    # Tempo grid consumption sensors
+    CONF_USE_TEMPO_FEATURE: (
+        _energy("blue_hc_grid_consumption"),
+        _energy("blue_hp_grid_consumption"),
+        _energy("white_hc_grid_consumption"),
+        _energy("white_hp_grid_consumption"),
+        _energy("red_hc_grid_consumption"),
+        _energy("red_hp_grid_consumption"),
+    ),
+    # Production surplus sensor
+    CONF_USE_PROD_FEATURE: (
+        _energy("production_surplus"),
+    ),
+}
+
+# Sensors needing more than the values of the readings
+SENSOR_CLASSES = {
+    "estimated_grid_consumption": EcojokoEstimateSensor,
+}
+
+# Temperature & Humidity sensors
+TEMP_HUM_SENSORS: tuple[SensorEntityDescription, ...] = (
+    _temperature("indoor_temp"),
+    _temperature("outdoor_temp"),
+    _humidity("indoor_hum"),
+    _humidity("outdoor_hum"),
+)
+
+
 async def async_setup_entry(hass, config_entry, async_add_entities):
     """Set up the custom component sensors."""
     # Fetch data or configure your sensors here
     coordinator = hass.data[DOMAIN][config_entry.entry_id]
+    entities = []
 
-    # Create the main device entity
-    firmware = coordinator.data["gateway_firmware_version"]
-    main_device = EcojokoEntity(coordinator, config_entry.data.get(CONF_NAME), firmware)
-
-    # Create child entities and link them to the main device
-
-    # Real time sensor
-    main_device.add_child_entity(EcojokoSensor(
-        main_device,
-        "realtime_consumption",
-        SensorStateClass.MEASUREMENT,
-        SensorDeviceClass.POWER,
-        UnitOfPower.WATT,
-        "mdi:flash"))
-
-    # Grid consumption sensor
-    main_device.add_child_entity(EcojokoSensor(
-        main_device,
-        "grid_consumption",
-        SensorStateClass.TOTAL_INCREASING,
-        SensorDeviceClass.ENERGY,
-        UnitOfEnergy.KILO_WATT_HOUR,
-        "mdi:lightning-bolt"))
+    # One main device per gateway
+    for index, gateway in enumerate(coordinator.client.gateways):
+        device_ids = gateway["power_meter_ids"] + gateway["temp_hum_ids"]
+        if not device_ids:
+            continue
+        device_name = config_entry.data.get(CONF_NAME)
+        if index > 0:
+            device_name = f"{device_name} {gateway['gateway_id']}"
 
-    # HC/HP grid consumption sensors
-    if config_entry.data.get(CONF_USE_HCHP_FEATURE) is True:
-        main_device.add_child_entity(EcojokoSensor(
-            main_device,
-            "hc_grid_consumption",
-            SensorStateClass.TOTAL_INCREASING,
-            SensorDeviceClass.ENERGY,
-            UnitOfEnergy.KILO_WATT_HOUR,
-            "mdi:lightning-bolt"))
-        main_device.add_child_entity(EcojokoSensor(
-            main_device,
-            "hp_grid_consumption",
-            SensorStateClass.TOTAL_INCREASING,
-            SensorDeviceClass.ENERGY,
-            UnitOfEnergy.KILO_WATT_HOUR,
-            "mdi:lightning-bolt"))
+        # Create the main device entity
+        firmware = coordinator.data.get(device_ids[0]).gateway_firmware_version
+        main_device = EcojokoEntity(coordinator, device_name, firmware, device_ids[0])
 
-    # Tempo grid consumption sensors
-    if config_entry.data.get(CONF_USE_TEMPO_FEATURE) is True:
-        main_device.add_child_entity(EcojokoSensor(
-            main_device,
-            "blue_hc_grid_consumption",
-            SensorStateClass.TOTAL_INCREASING,
-            SensorDeviceClass.ENERGY,
-            UnitOfEnergy.KILO_WATT_HOUR,
-            "mdi:lightning-bolt"))
-        main_device.add_child_entity(EcojokoSensor(
-            main_device,
-            "blue_hp_grid_consumption",
-            SensorStateClass.TOTAL_INCREASING,
-            SensorDeviceClass.ENERGY,
-            UnitOfEnergy.KILO_WATT_HOUR,
-            "mdi:lightning-bolt"))
-        main_device.add_child_entity(EcojokoSensor(
-            main_device,
-            "white_hc_grid_consumption",
-            SensorStateClass.TOTAL_INCREASING,
-            SensorDeviceClass.ENERGY,
-            UnitOfEnergy.KILO_WATT_HOUR,
-            "mdi:lightning-bolt"))
-        main_device.add_child_entity(EcojokoSensor(
-            main_device,
-            "white_hp_grid_consumption",
-            SensorStateClass.TOTAL_INCREASING,
-            SensorDeviceClass.ENERGY,
-            UnitOfEnergy.KILO_WATT_HOUR,
-            "mdi:lightning-bolt"))
-        main_device.add_child_entity(EcojokoSensor(
-            main_device,
-            "red_hc_grid_consumption",
-            SensorStateClass.TOTAL_INCREASING,
-            SensorDeviceClass.ENERGY,
-            UnitOfEnergy.KILO_WATT_HOUR,
-            "mdi:lightning-bolt"))
-        main_device.add_child_entity(EcojokoSensor(
-            main_device,
-            "red_hp_grid_consumption",
-            SensorStateClass.TOTAL_INCREASING,
-            SensorDeviceClass.ENERGY,
-            UnitOfEnergy.KILO_WATT_HOUR,
-            "mdi:lightning-bolt"))
+        # Create child entities and link them to the main device
+        # The last device of each type, that the single-device versions
+        # followed, keeps the historical names and ids
+        power_meter_ids = gateway["power_meter_ids"]
+        for device_index, device_id in enumerate(power_meter_ids):
+            _add_power_meter_sensors(config_entry, main_device, device_id, device_index,
+                                     device_index == len(power_meter_ids) - 1)
+        # Temperature & Humidity sensors
+        if config_entry.data.get(CONF_USE_TEMPHUM_FEATURE) is True:
+            temp_hum_ids = gateway["temp_hum_ids"]
+            for device_index, device_id in enumerate(temp_hum_ids):
+                _add_temp_hum_sensors(main_device, device_id, device_index,
+                                      device_index == len(temp_hum_ids) - 1)
+        # Call statistics of the account, on the first gateway
+        if index == 0:
+            _add_diagnostic_sensors(main_device)
 
-    # Production surplus sensor
-    if config_entry.data.get(CONF_USE_PROD_FEATURE) is True:
-        main_device.add_child_entity(EcojokoSensor(
-            main_device,
-            "production_surplus",
-            SensorStateClass.TOTAL_INCREASING,
-            SensorDeviceClass.ENERGY,
-            UnitOfEnergy.KILO_WATT_HOUR,
-            "mdi:lightning-bolt"))
-
-    # Temperature & Humidity sensors
-    if config_entry.data.get(CONF_USE_TEMPHUM_FEATURE) is True:
-        main_device.add_child_entity(EcojokoSensor(
-            main_device,
-            "indoor_temp",
-            SensorStateClass.MEASUREMENT,
-            SensorDeviceClass.TEMPERATURE,
-            UnitOfTemperature.CELSIUS,
-            "mdi:thermometer"))
-        main_device.add_child_entity(EcojokoSensor(
-            main_device,
-            "outdoor_temp",
-            SensorStateClass.MEASUREMENT,
-            SensorDeviceClass.TEMPERATURE,
-            UnitOfTemperature.CELSIUS,
-            "mdi:thermometer"))
-        main_device.add_child_entity(EcojokoSensor(
-            main_device,
-            "indoor_hum",
-            SensorStateClass.MEASUREMENT,
-            SensorDeviceClass.HUMIDITY,
-            PERCENTAGE,
-            "mdi:water"))
+        entities += [main_device] + main_device.child_entities
+
+    async_add_entities(entities)
+
+
+def _add_power_meter_sensors(config_entry, main_device, device_id, device_index, historical):
+    """Create the sensors of a power meter."""
+    for option, descriptions in POWER_METER_SENSORS.items():
+        if option is not None and config_entry.data.get(option) is not True:
+            continue
+        for description in descriptions:
+            sensor_class = SENSOR_CLASSES.get(description.key, EcojokoSensor)
+            main_device.add_child_entity(sensor_class(
+                main_device, description, device_id, device_index, historical))
+
+
+def _add_diagnostic_sensors(main_device):
+    """Create the call statistics sensors of every data endpoint."""
+    for endpoint in ENDPOINT_SENSORS:
+        main_device.add_child_entity(EcojokoDiagnosticSensor(
+            main_device, "api_latency", endpoint))
+        main_device.add_child_entity(EcojokoDiagnosticSensor(
+            main_device, "api_errors", endpoint))
+
+
+def _add_temp_hum_sensors(main_device, device_id, device_index, historical):
+    """Create the sensors of a temperature and humidity device."""
+    for description in TEMP_HUM_SENSORS:
         main_device.add_child_entity(EcojokoSensor(
-            main_device,
-            "outdoor_hum",
-            SensorStateClass.MEASUREMENT,
-            SensorDeviceClass.HUMIDITY,
-            PERCENTAGE,
-            "mdi:water"))
-
-    async_add_entities([main_device] + main_device.child_entities)
+            main_device, description, device_id, device_index, historical))
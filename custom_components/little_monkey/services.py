@@ -0,0 +1,83 @@
+"""Services for little_monkey."""
+from __future__ import annotations
+
+import voluptuous as vol
+
+import homeassistant.helpers.config_validation as cv
+from homeassistant.core import HomeAssistant, ServiceCall, ServiceResponse, SupportsResponse
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.util import dt as dt_util
+
+from .const import CONF_SAMPLES_MAX_POINTS, DOMAIN, SERVICE_GET_REALTIME_SAMPLES
+
+ATTR_CONFIG_ENTRY = "config_entry"
+ATTR_DEVICE_ID = "device_id"
+ATTR_START = "start"
+ATTR_END = "end"
+ATTR_STEP = "step"
+
+GET_REALTIME_SAMPLES_SCHEMA = vol.Schema(
+    {
+        vol.Required(ATTR_CONFIG_ENTRY): cv.string,
+        vol.Optional(ATTR_DEVICE_ID): cv.string,
+        vol.Required(ATTR_START): cv.datetime,
+        vol.Optional(ATTR_END): cv.datetime,
+        vol.Optional(ATTR_STEP, default=60): vol.All(vol.Coerce(int), vol.Range(min=1)),
+    }
+)
+
+
+async def _async_get_realtime_samples(hass: HomeAssistant, call: ServiceCall) -> ServiceResponse:
+    """Return the downsampled realtime consumption of the power meters of an entry."""
+    coordinator = hass.data.get(DOMAIN, {}).get(call.data[ATTR_CONFIG_ENTRY])
+    if coordinator is None:
+        raise HomeAssistantError(f"Unknown {DOMAIN} entry {call.data[ATTR_CONFIG_ENTRY]}")
+    samples = coordinator.samples
+    if samples is None:
+        raise HomeAssistantError("The realtime consumption history is not enabled")
+
+    start = dt_util.as_timestamp(call.data[ATTR_START])
+    end = dt_util.as_timestamp(call.data.get(ATTR_END, dt_util.utcnow()))
+    step = call.data[ATTR_STEP]
+    if end <= start:
+        raise HomeAssistantError("The end of the window must be after its start")
+    if (end - start) / step > CONF_SAMPLES_MAX_POINTS:
+        raise HomeAssistantError(
+            f"More than {CONF_SAMPLES_MAX_POINTS} points, increase the step")
+    device_ids = samples.device_ids
+    if ATTR_DEVICE_ID in call.data:
+        if call.data[ATTR_DEVICE_ID] not in device_ids:
+            raise HomeAssistantError(f"Unknown power meter {call.data[ATTR_DEVICE_ID]}")
+        device_ids = [call.data[ATTR_DEVICE_ID]]
+
+    power_meters = {}
+    for device_id in device_ids:
+        points = await samples.async_downsample(device_id, start, end, step)
+        for point in points:
+            point["start"] = dt_util.as_local(
+                dt_util.utc_from_timestamp(point["start"])).isoformat()
+        power_meters[device_id] = points
+    return {"step": step, "power_meters": power_meters}
+
+
+def async_setup_services(hass: HomeAssistant) -> None:
+    """Register the services of the integration once."""
+    if hass.services.has_service(DOMAIN, SERVICE_GET_REALTIME_SAMPLES):
+        return
+
+    async def _async_handle(call: ServiceCall) -> ServiceResponse:
+        return await _async_get_realtime_samples(hass, call)
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_GET_REALTIME_SAMPLES,
+        _async_handle,
+        schema=GET_REALTIME_SAMPLES_SCHEMA,
+        supports_response=SupportsResponse.ONLY,
+    )
+
+
+def async_unload_services(hass: HomeAssistant) -> None:
+    """Remove the services of the integration with its last entry."""
+    if not hass.data.get(DOMAIN):
+        hass.services.async_remove(DOMAIN, SERVICE_GET_REALTIME_SAMPLES)
@@ -0,0 +1,132 @@
+"""Persistent cache for little_monkey."""
+from __future__ import annotations
+
+import asyncio
+import time
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+
+from .const import (
+    DATA_STORE,
+    ECOJOKO_BASE_URL,
+    STORAGE_KEY,
+    STORAGE_SAVE_DELAY,
+    STORAGE_VERSION,
+)
+
+
+def account_key(username: str, base_url: str) -> str:
+    """Return the key of the cache of an account of an Ecojoko service."""
+    # The accounts of the Ecojoko service keep the keys they were cached with
+    base_url = base_url.rstrip("/")
+    if base_url == ECOJOKO_BASE_URL:
+        return username
+    return f"{username}@{base_url}"
+
+
+class LittleMonkeyStore:
+    """Per-account cache persisted in Home Assistant storage."""
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize."""
+        self._store = Store(hass, STORAGE_VERSION, STORAGE_KEY, private=True)
+        self._accounts: dict[str, dict] = {}
+        self._lock = asyncio.Lock()
+        self._loaded = False
+
+    async def async_load(self) -> None:
+        """Load the cache from disk once."""
+        async with self._lock:
+            if self._loaded:
+                return
+            data = await self._store.async_load()
+            if isinstance(data, dict):
+                self._accounts = data.get("accounts", {})
+            self._loaded = True
+
+    def get_session(self, key: str) -> dict | None:
+        """Return the cached session cookies of an account if still valid."""
+        session = self._accounts.get(key, {}).get("session")
+        if session is None or session.get("expires", 0) <= time.time():
+            return None
+        return session.get("cookies")
+
+    @callback
+    def set_session(self, key: str, cookies: dict, expires: float) -> None:
+        """Cache the session cookies of an account."""
+        self._accounts.setdefault(key, {})["session"] = {
+            "cookies": cookies,
+            "expires": expires,
+        }
+        self._async_schedule_save()
+
+    @callback
+    def clear_session(self, key: str) -> None:
+        """Forget the session cookies of an account."""
+        if self._accounts.get(key, {}).pop("session", None) is not None:
+            self._async_schedule_save()
+
+    def get_topology(self, key: str, max_age: float) -> dict | None:
+        """Return the cached gateway topology of an account if not too old."""
+        topology = self._accounts.get(key, {}).get("topology")
+        if topology is None or topology.get("updated", 0) + max_age <= time.time():
+            return None
+        return topology.get("data")
+
+    @callback
+    def set_topology(self, key: str, topology: dict) -> None:
+        """Cache the gateway topology of an account."""
+        self._accounts.setdefault(key, {})["topology"] = {
+            "data": topology,
+            "updated": time.time(),
+        }
+        self._async_schedule_save()
+
+    def get_backfill(self, key: str, device_id: str) -> dict | None:
+        """Return the backfill checkpoint of a power meter."""
+        return self._accounts.get(key, {}).get("backfill", {}).get(device_id)
+
+    @callback
+    def set_backfill(self, key: str, device_id: str, checkpoint: dict) -> None:
+        """Save the backfill checkpoint of a power meter."""
+        self._accounts.setdefault(key, {}).setdefault(
+            "backfill", {})[device_id] = checkpoint
+        self._async_schedule_save()
+
+    def get_snapshot(self, key: str, entry_id: str) -> dict | None:
+        """Return the last good snapshot of an entry and when it was saved."""
+        return self._accounts.get(key, {}).get("snapshots", {}).get(entry_id)
+
+    @callback
+    def set_snapshot(self, key: str, entry_id: str, snapshot: dict) -> None:
+        """Save the last good snapshot of an entry."""
+        self._accounts.setdefault(key, {}).setdefault("snapshots", {})[entry_id] = {
+            "data": snapshot,
+            "updated": time.time(),
+        }
+        self._async_schedule_save()
+
+    @callback
+    def clear_snapshot(self, key: str, entry_id: str) -> None:
+        """Forget the snapshot of a removed entry."""
+        if self._accounts.get(key, {}).get("snapshots", {}).pop(entry_id, None) is not None:
+            self._async_schedule_save()
+
+    @callback
+    def _async_schedule_save(self) -> None:
+        """Schedule a delayed write of the cache."""
+        self._store.async_delay_save(self._data_to_save, STORAGE_SAVE_DELAY)
+
+    @callback
+    def _data_to_save(self) -> dict:
+        """Return the data to persist."""
+        return {"accounts": self._accounts}
+
+
+async def async_get_store(hass: HomeAssistant) -> LittleMonkeyStore:
+    """Return the process-wide little_monkey cache."""
+    if (store := hass.data.get(DATA_STORE)) is None:
+        store = hass.data[DATA_STORE] = LittleMonkeyStore(hass)
+    await store.async_load()
+    return store
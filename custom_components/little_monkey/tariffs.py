@@ -0,0 +1,53 @@
+"""Tariff buckets of the Ecojoko subconsumption for little_monkey."""
+from __future__ import annotations
+
+from functools import lru_cache
+
+from .const import CONF_USE_HCHP_FEATURE, CONF_USE_TEMPO_FEATURE
+
+# Normalized label prefixes of the subconsumption feeding each sensor
+TARIFF_BUCKETS = {
+    # Tempo
+    "blue_hc_grid_consumption": ("hc bleu",),
+    "blue_hp_grid_consumption": ("hp bleu",),
+    "white_hc_grid_consumption": ("hc blanc",),
+    "white_hp_grid_consumption": ("hp blanc",),
+    "red_hc_grid_consumption": ("hc rouge",),
+    "red_hp_grid_consumption": ("hp rouge",),
+    # HC/HP, summing the colors of a Tempo contract
+    # 74 bug fix
+    "hc_grid_consumption": ("heures creuses", "hc"),
+    "hp_grid_consumption": ("heures pleines", "hp"),
+}
+
+# Sensors of each tariff option
+TARIFF_OPTIONS = {
+    CONF_USE_TEMPO_FEATURE: (
+        "blue_hc_grid_consumption",
+        "blue_hp_grid_consumption",
+        "white_hc_grid_consumption",
+        "white_hp_grid_consumption",
+        "red_hc_grid_consumption",
+        "red_hp_grid_consumption",
+    ),
+    CONF_USE_HCHP_FEATURE: ("hc_grid_consumption", "hp_grid_consumption"),
+}
+
+
+@lru_cache(maxsize=64)
+def get_label_buckets(label: str) -> tuple[str, ...]:
+    """Return the sensors fed by a subconsumption label."""
+    label = " ".join(label.split()).casefold()
+    return tuple(
+        bucket for bucket, prefixes in TARIFF_BUCKETS.items()
+        if label.startswith(prefixes)
+    )
+
+
+def index_subconsumption(subconsumption) -> dict[str, float]:
+    """Return the energy of every tariff sensor from (label, kwh) pairs, in a single pass."""
+    index = {}
+    for label, kwh in subconsumption:
+        for bucket in get_label_buckets(label):
+            index[bucket] = index.get(bucket, 0.0) + kwh
+    return index
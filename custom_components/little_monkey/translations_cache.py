@@ -0,0 +1,50 @@
+"""Sensor name translations shared by every little_monkey entry."""
+from __future__ import annotations
+
+import asyncio
+from pathlib import Path
+
+from homeassistant.core import HomeAssistant
+from homeassistant.util import json
+
+from .const import DOMAIN, LOGGER
+
+# Resolved from this module, whatever the working directory of Home Assistant
+TRANSLATIONS_DIR = Path(__file__).parent / f"{DOMAIN}_translations"
+FALLBACK_LANGUAGE = "en"
+
+# Parsed translation files, keyed by language
+_TRANSLATIONS: dict[str, dict[str, str]] = {}
+_LOCK = asyncio.Lock()
+
+
+def _load_json(language: str) -> dict | None:
+    """Load the translation file of a language, None if it can not be read."""
+    try:
+        return json.load_json(str(TRANSLATIONS_DIR / f"{language}.json"), None)
+    except Exception:  # pylint: disable=broad-except
+        return None
+
+
+def _load_translations(language: str) -> dict[str, str]:
+    """Load the translation file of a language, back to english."""
+    translations = _load_json(language)
+    if translations is None:
+        LOGGER.warning(
+            'Sensor translation file %s.json does not exist. Defaulting to en-US.',
+            language
+        )
+        translations = _load_json(FALLBACK_LANGUAGE) or {}
+    return translations
+
+
+async def async_get_translations(hass: HomeAssistant, lang: str) -> dict[str, str]:
+    """Return the sensor names of a language, loaded once per process."""
+    language = lang.split('-', 1)[0]
+    if (translations := _TRANSLATIONS.get(language)) is None:
+        async with _LOCK:
+            if (translations := _TRANSLATIONS.get(language)) is None:
+                translations = await hass.async_add_executor_job(
+                    _load_translations, language)
+                _TRANSLATIONS[language] = translations
+    return translations
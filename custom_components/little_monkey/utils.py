@@ -2,6 +2,10 @@
 from __future__ import annotations
 
 import datetime
+import random
+import time
+from contextlib import suppress
+from email.utils import parsedate_to_datetime
 import pytz
 
 def has_day_changed(datetime1, datetime2):
@@ -20,17 +24,19 @@ def get_current_date(timezone):
     """Return local date."""
     return datetime.datetime.now(timezone).date()
 
-def get_current_time(timezone):
-    """Return local time."""
-    return datetime.datetime.now(timezone).time()
+def get_cookies_expiry(cookies, max_age):
+    """Return the timestamp at which the first of the cookies expires."""
+    now = time.time()
+    expires = now + max_age
+    for morsel in cookies.values():
+        if morsel["max-age"]:
+            with suppress(ValueError):
+                expires = min(expires, now + int(morsel["max-age"]))
+        elif morsel["expires"]:
+            with suppress(TypeError, ValueError):
+                expires = min(expires, parsedate_to_datetime(morsel["expires"]).timestamp())
+    return expires
 
-def get_value_from_json_array(json_array, item_key, item_value, value_key):
-    """Return value from JSON array."""
-    for item in json_array:
-        if item[item_key] == item_value:
-            return item[value_key]
-    return None
-
-def convert_to_float(value):
-    """Convert to float."""
-    return float(value) if value is not None else 0
+def get_backoff_delay(attempt, base, maximum):
+    """Return the exponential backoff delay of a retry, with full jitter."""
+    return random.uniform(0, min(maximum, base * 2 ** attempt))
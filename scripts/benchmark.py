@@ -0,0 +1,233 @@
+"""Benchmark of the little_monkey poll cycles against the local Ecojoko stub.
+
+Drives the clients and coordinators of 1, 10 and 100 entries sharing one
+Home Assistant event loop with an in-process stub, and reports for cold
+caches (first cycle: login, discovery, week statistics) and warm caches
+(the following cycles):
+
+- wall: seconds for every entry to complete a realtime and statistics cycle
+- loop_block_ms: event loop time spent decoding and extracting payloads
+- alloc_kb: memory allocated during the cycle, traced in a separate run
+- bytes: payload bytes downloaded
+- errors: entries whose cycle failed
+
+The results are compared with scripts/benchmark_baseline.json, which
+--save rewrites. Baselines depend on the machine: save them on the one
+running the comparisons.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import logging
+from pathlib import Path
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import aiohttp
+from aiohttp import web
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+# pylint: disable=wrong-import-position
+from homeassistant.config_entries import ConfigEntry  # noqa: E402
+from homeassistant.const import CONF_NAME, CONF_PASSWORD, CONF_USERNAME  # noqa: E402
+from homeassistant.core import HomeAssistant  # noqa: E402
+
+from custom_components.little_monkey.api import LittleMonkeyApiClient  # noqa: E402
+from custom_components.little_monkey.const import (  # noqa: E402
+    CONF_LANG,
+    CONF_USE_HCHP_FEATURE,
+    CONF_USE_PROD_FEATURE,
+    CONF_USE_TEMPHUM_FEATURE,
+    CONF_USE_TEMPO_FEATURE,
+    DOMAIN,
+    POLL_INTERVAL,
+)
+from custom_components.little_monkey.coordinator import (  # noqa: E402
+    LittleMonkeyDataUpdateCoordinator,
+)
+from ecojoko_stub import EcojokoStub  # noqa: E402
+
+BASELINE = Path(__file__).with_name("benchmark_baseline.json")
+ENTRIES = (1, 10, 100)
+COLD_RUNS = 3
+WARM_CYCLES = 5
+# Relative increase reported as a regression
+TOLERANCE = 0.25
+# Statistics due on every cycle, so that warm cycles call every endpoint
+STAT_PERIODS = {"powerstat": 0, "tempstat": 0, "humstat": 0}
+
+
+class Entry:
+    """Client and coordinators of a config entry."""
+
+    def __init__(self, hass: HomeAssistant, session: aiohttp.ClientSession,
+                 base_url: str, index: int) -> None:
+        """Initialize."""
+        data = {
+            CONF_NAME: f"Ecojoko {index}",
+            CONF_USERNAME: f"user{index}@example.com",
+            CONF_PASSWORD: "password",
+            POLL_INTERVAL: 5,
+            CONF_USE_HCHP_FEATURE: True,
+            CONF_USE_TEMPO_FEATURE: True,
+            CONF_USE_TEMPHUM_FEATURE: True,
+            CONF_USE_PROD_FEATURE: True,
+        }
+        self.client = LittleMonkeyApiClient(
+            username=data[CONF_USERNAME],
+            password=data[CONF_PASSWORD],
+            poll_interval=data[POLL_INTERVAL],
+            use_hchp=True,
+            use_tempo=True,
+            use_temphum=True,
+            use_prod=True,
+            session=session,
+            stat_periods=STAT_PERIODS,
+            base_url=base_url,
+        )
+        entry = ConfigEntry(
+            version=1,
+            domain=DOMAIN,
+            title=data[CONF_NAME],
+            data=data,
+            source="user",
+            options={CONF_LANG: "en-US"},
+        )
+        self.coordinator = LittleMonkeyDataUpdateCoordinator(hass, entry, self.client)
+
+    async def async_cycle(self) -> None:
+        """Run a realtime and a statistics update."""
+        await self.coordinator._async_update_data()  # pylint: disable=protected-access
+        await self.coordinator.statistics._async_update_data()  # pylint: disable=protected-access
+
+    def loop_block(self) -> float:
+        """Return the event loop time blocked by the last cycle, in ms."""
+        return sum(poll["last"] for poll in self.client.loop_block.values())
+
+    def bytes(self) -> int:
+        """Return the payload bytes downloaded so far."""
+        return sum(endpoint["bytes"] for endpoint in self.client.metrics.as_dict().values())
+
+
+async def _async_cycle(entries: list[Entry]) -> dict:
+    """Run a cycle of every entry, returning its wall time, loop block, bytes and errors."""
+    downloaded = sum(entry.bytes() for entry in entries)
+    start = time.perf_counter()
+    cycles = await asyncio.gather(
+        *(entry.async_cycle() for entry in entries), return_exceptions=True)
+    return {
+        "wall": time.perf_counter() - start,
+        "errors": sum(isinstance(cycle, Exception) for cycle in cycles),
+        "loop_block_ms": sum(entry.loop_block() for entry in entries),
+        "bytes": sum(entry.bytes() for entry in entries) - downloaded,
+    }
+
+
+async def _async_measure(entries: list[Entry], traced: bool) -> dict:
+    """Run a cycle of every entry, tracing its allocations instead when traced."""
+    if not traced:
+        return await _async_cycle(entries)
+    tracemalloc.start()
+    try:
+        await _async_cycle(entries)
+        return {"alloc_kb": tracemalloc.get_traced_memory()[1] / 1024}
+    finally:
+        tracemalloc.stop()
+
+
+async def _async_run(hass: HomeAssistant, base_url: str, count: int, traced: bool) -> dict:
+    """Return the median cold and warm cycle results of some entries."""
+    samples = {"cold": [], "warm": []}
+    async with aiohttp.ClientSession() as session:
+        # Fresh entries for every cold sample, the last ones warm up
+        entries = []
+        for _ in range(COLD_RUNS):
+            for entry in entries:
+                entry.client.close()
+            entries = [Entry(hass, session, base_url, index) for index in range(count)]
+            samples["cold"].append(await _async_measure(entries, traced))
+        for _ in range(WARM_CYCLES):
+            samples["warm"].append(await _async_measure(entries, traced))
+        for entry in entries:
+            entry.client.close()
+    return {
+        phase: {
+            name: statistics.median(result[name] for result in results)
+            for name in results[0]
+        }
+        for phase, results in samples.items()
+    }
+
+
+async def async_benchmark(entry_counts) -> dict:
+    """Benchmark every number of entries against a fresh stub."""
+    results = {}
+    with tempfile.TemporaryDirectory() as config_dir:
+        hass = HomeAssistant(config_dir)
+        for count in entry_counts:
+            run = {}
+            for traced in (False, True):
+                stub = EcojokoStub(production=True)
+                runner = web.AppRunner(stub.app, access_log=None)
+                await runner.setup()
+                site = web.TCPSite(runner, "127.0.0.1", 0)
+                await site.start()
+                port = runner.addresses[0][1]
+                try:
+                    measured = await _async_run(hass, f"http://127.0.0.1:{port}", count, traced)
+                finally:
+                    await runner.cleanup()
+                for phase, values in measured.items():
+                    run.setdefault(phase, {}).update(values)
+            results[str(count)] = {
+                phase: {name: round(value, 4) for name, value in sorted(values.items())}
+                for phase, values in run.items()
+            }
+        await hass.async_stop(force=True)
+    return results
+
+
+def compare(results: dict, baseline: dict) -> list[str]:
+    """Return the metrics that regressed from the baseline."""
+    regressions = []
+    for count, phases in results.items():
+        for phase, values in phases.items():
+            for name, value in values.items():
+                reference = baseline.get(count, {}).get(phase, {}).get(name)
+                if reference is None:
+                    continue
+                if value > reference * (1 + TOLERANCE) if reference else value > reference:
+                    regressions.append(
+                        f"{count} entries {phase} {name}: {value} > {reference}")
+    return regressions
+
+
+def main() -> int:
+    """Run the benchmark, compare or save the results."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n", 1)[0])
+    parser.add_argument("--entries", type=int, nargs="+", default=list(ENTRIES))
+    parser.add_argument("--save", action="store_true", help="rewrite the baseline")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.CRITICAL)
+
+    results = asyncio.run(async_benchmark(args.entries))
+    print(json.dumps(results, indent=2))  # noqa: T201
+    if args.save:
+        BASELINE.write_text(json.dumps(results, indent=2) + "\n")
+        return 0
+    if not BASELINE.exists():
+        return 0
+    regressions = compare(results, json.loads(BASELINE.read_text()))
+    for regression in regressions:
+        print(f"REGRESSION {regression}")  # noqa: T201
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
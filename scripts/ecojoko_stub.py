@@ -0,0 +1,426 @@
+"""Local stub of the Ecojoko service, with fault injection.
+
+Serves the endpoints used by little_monkey with realistic payloads, so that
+the integration can be developed, tested and benchmarked offline. Point an
+entry at it by adding "base_url": "http://127.0.0.1:8080" to its data.
+
+The faults can be set on the command line, or at runtime with
+POST /_faults and a JSON object of the fields of Faults. GET /_stats returns
+the number of requests served per endpoint.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+from dataclasses import asdict, dataclass, field, fields
+import datetime
+import hashlib
+import json
+import math
+import random
+import secrets
+
+from aiohttp import web
+
+SESSION_COOKIE = "session"
+FIRMWARE_VERSION = "2.0.19"
+
+# Subconsumption labels of each contract
+TARIFF_LABELS = {
+    "base": (),
+    "hchp": ("Heures Creuses", "Heures Pleines"),
+    "tempo": ("HC Bleu", "HP Bleu", "HC Blanc", "HP Blanc", "HC Rouge", "HP Rouge"),
+}
+
+# Minutes between two samples of the day statistics
+DAY_SAMPLE_MINUTES = 10
+# Entries of the caches of the computed payload parts
+CACHE_MAX = 100000
+
+
+@dataclass
+class Faults:
+    """Faults injected in the answers of the stub."""
+
+    # Seconds added to every answer, and its random part
+    latency: float = 0.0
+    jitter: float = 0.0
+    # Answer 401 or 403 until the next login
+    expire_session: bool = False
+    expiry_status: int = 401
+    # Endpoints never answering, or answering malformed JSON
+    timeout: list[str] = field(default_factory=list)
+    malformed: list[str] = field(default_factory=list)
+    # Endpoints answering 503 with this probability
+    error_rate: float = 0.0
+    error_endpoints: list[str] = field(default_factory=list)
+    # Days added to the clock of the stub, for day rollovers
+    day_offset: int = 0
+
+    def update(self, values: dict) -> None:
+        """Set the faults given by name."""
+        names = {fault.name for fault in fields(self)}
+        for name, value in values.items():
+            if name not in names:
+                raise ValueError(f"unknown fault {name}")
+            setattr(self, name, value)
+
+
+@dataclass
+class Gateway:
+    """Devices of a stub gateway."""
+
+    gateway_id: str
+    power_meter_ids: list[str]
+    temp_hum_ids: list[str]
+
+
+class EcojokoStub:
+    """aiohttp application imitating the Ecojoko service."""
+
+    def __init__(
+        self,
+        gateways: int = 1,
+        power_meters: int = 1,
+        temp_hums: int = 1,
+        tariff: str = "tempo",
+        production: bool = False,
+        etag: bool = False,
+        faults: Faults | None = None,
+        seed: int = 0,
+    ) -> None:
+        """Initialize."""
+        self.faults = faults or Faults()
+        self.requests: dict[str, int] = {}
+        self._labels = TARIFF_LABELS[tariff]
+        self._production = production
+        self._etag = etag
+        self._seed = seed
+        self._sessions: set[str] = set()
+        # Payloads are deterministic, their parts are computed once
+        self._noises: dict[tuple, float] = {}
+        self._energies: dict[tuple, dict] = {}
+        self._gateways = {
+            f"{seed}{index:04d}": Gateway(
+                gateway_id=f"{seed}{index:04d}",
+                power_meter_ids=[f"{seed}{index:04d}{meter:02d}" for meter in range(power_meters)],
+                temp_hum_ids=[f"{seed}{index:04d}{50 + sensor:02d}" for sensor in range(temp_hums)],
+            )
+            for index in range(gateways)
+        }
+        self.app = web.Application(middlewares=[self._middleware])
+        self.app.add_routes([
+            web.get("/login", self._login),
+            web.post("/login", self._login),
+            web.get("/gateways", self._gateways_handler),
+            web.get("/gateway/{gateway_id}/device/{device_id}/realtime_conso", self._realtime_conso),
+            web.get("/gateway/{gateway_id}/device/{device_id}/powerstat/w/{date}", self._powerstat_week),
+            web.get("/gateway/{gateway_id}/device/{device_id}/powerstat/d4/{date}", self._powerstat_day),
+            web.get("/gateway/{gateway_id}/device/{device_id}/tempstat/d4/{date}", self._tempstat),
+            web.get("/gateway/{gateway_id}/device/{device_id}/humstat/d4/{date}", self._humstat),
+            web.post("/_faults", self._set_faults),
+            web.get("/_stats", self._stats),
+        ])
+
+    def now(self) -> datetime.datetime:
+        """Return the time of the stub, day offset included."""
+        return datetime.datetime.now() + datetime.timedelta(days=self.faults.day_offset)
+
+    @staticmethod
+    def endpoint(request: web.Request) -> str:
+        """Return the endpoint of a request, as named by the integration."""
+        parts = request.path.strip("/").split("/")
+        if parts[0] == "gateway" and len(parts) > 4:
+            return parts[4]
+        return parts[0]
+
+    @web.middleware
+    async def _middleware(self, request: web.Request, handler):
+        """Count the requests and inject the faults."""
+        endpoint = self.endpoint(request)
+        if endpoint.startswith("_"):
+            return await handler(request)
+        self.requests[endpoint] = self.requests.get(endpoint, 0) + 1
+        faults = self.faults
+        delay = faults.latency + random.uniform(0, faults.jitter)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if endpoint in faults.timeout:
+            # Longer than any timeout of the integration
+            await asyncio.sleep(3600)
+        if endpoint != "login":
+            session = request.cookies.get(SESSION_COOKIE)
+            if faults.expire_session or session not in self._sessions:
+                raise _status(faults.expiry_status)
+        if endpoint in faults.error_endpoints and random.random() < faults.error_rate:
+            raise _status(503)
+        response = await handler(request)
+        if endpoint in faults.malformed and response.body:
+            response.body = response.body[:len(response.body) // 2]
+        return response
+
+    def _json(self, request: web.Request, payload: dict) -> web.Response:
+        """Return a JSON answer, revalidated with an ETag when enabled."""
+        body = json.dumps(payload).encode()
+        headers = {}
+        if self._etag:
+            etag = f'"{hashlib.sha1(body).hexdigest()}"'
+            if request.headers.get("If-None-Match") == etag:
+                return web.Response(status=304, headers={"ETag": etag})
+            headers["ETag"] = etag
+        return web.Response(body=body, content_type="application/json", headers=headers)
+
+    def _device(self, request: web.Request, kind: str) -> str:
+        """Return the device id of a request, checking it belongs to its gateway."""
+        gateway = self._gateways.get(request.match_info["gateway_id"])
+        device_id = request.match_info["device_id"]
+        if gateway is None or device_id not in getattr(gateway, kind):
+            raise web.HTTPNotFound()
+        return device_id
+
+    @staticmethod
+    def _date(request: web.Request) -> datetime.date:
+        """Return the date of a statistics request."""
+        try:
+            return datetime.date.fromisoformat(request.match_info["date"])
+        except ValueError as exception:
+            raise web.HTTPBadRequest() from exception
+
+    async def _login(self, request: web.Request) -> web.Response:
+        """Open a session."""
+        try:
+            credentials = json.loads(await request.read() or b"{}")
+        except ValueError:
+            credentials = {}
+        if not credentials.get("l") or not credentials.get("p"):
+            raise web.HTTPUnauthorized()
+        session = secrets.token_hex(16)
+        self._sessions.add(session)
+        self.faults.expire_session = False
+        response = web.Response(content_type="application/json", text="{}")
+        response.set_cookie(SESSION_COOKIE, session, max_age=43200)
+        return response
+
+    async def _gateways_handler(self, request: web.Request) -> web.Response:
+        """Return the gateways of the account and their devices."""
+        return self._json(request, {"gateways": [
+            {
+                "gateway_id": gateway.gateway_id,
+                "gateway_name": f"Ecojoko {gateway.gateway_id}",
+                "gateway_firmware_version": FIRMWARE_VERSION,
+                "devices": [
+                    {"device_id": device_id, "device_type": "POWER_METER"}
+                    for device_id in gateway.power_meter_ids
+                ] + [
+                    {"device_id": device_id, "device_type": "TEMP_HUM"}
+                    for device_id in gateway.temp_hum_ids
+                ],
+            }
+            for gateway in self._gateways.values()
+        ]})
+
+    def _noise(self, device_id: str, moment: datetime.datetime) -> float:
+        """Return the reproducible random part of a sample, between 0 and 1."""
+        key = (device_id, moment.replace(second=0, microsecond=0))
+        noise = self._noises.get(key)
+        if noise is None:
+            if len(self._noises) > CACHE_MAX:
+                self._noises.clear()
+            noise = self._noises[key] = random.Random(
+                f"{self._seed}{device_id}{moment:%Y%m%d%H%M}").random()
+        return noise
+
+    def _power(self, device_id: str, moment: datetime.datetime) -> float:
+        """Return the power drawn by a device at a moment, in W."""
+        hour = moment.hour + moment.minute / 60
+        return round(400 + 300 * math.sin((hour - 7) * math.pi / 12) ** 2
+                     + 150 * self._noise(device_id, moment))
+
+    def _energy(self, device_id: str, start: datetime.datetime, minutes: int) -> dict:
+        """Return the power statistics entry of a period, in kWh."""
+        key = (device_id, start, minutes)
+        entry = self._energies.get(key)
+        if entry is None:
+            if len(self._energies) > CACHE_MAX:
+                self._energies.clear()
+            entry = self._energies[key] = self._build_energy(device_id, start, minutes)
+        return entry
+
+    def _build_energy(self, device_id: str, start: datetime.datetime, minutes: int) -> dict:
+        """Build the power statistics entry of a period."""
+        kwh = sum(
+            self._power(device_id, start + datetime.timedelta(minutes=minute))
+            for minute in range(0, minutes, DAY_SAMPLE_MINUTES)
+        ) * DAY_SAMPLE_MINUTES / 60000
+        entry = {"date": start.isoformat(), "kwh": round(kwh, 3)}
+        if self._production:
+            entry["kwh_prod"] = -round(kwh * 0.2, 3)
+        if self._labels:
+            # Off-peak from 22:00 to 06:00, the Tempo color of the day
+            off_peak = start.hour >= 22 or start.hour < 6
+            color = ("Bleu", "Blanc", "Rouge")[start.toordinal() % 3]
+            entry["subconsumption"] = [
+                {"label": label, "kwh": round(kwh, 3) if self._is_billed(label, off_peak, color) else 0}
+                for label in self._labels
+            ]
+        return entry
+
+    def _is_billed(self, label: str, off_peak: bool, color: str) -> bool:
+        """Return True if the energy of a period is billed under a label."""
+        if label.startswith(("HC", "Heures Creuses")) != off_peak:
+            return False
+        return self._labels is not TARIFF_LABELS["tempo"] or label.endswith(color)
+
+    async def _realtime_conso(self, request: web.Request) -> web.Response:
+        """Return the realtime consumption of a power meter."""
+        device_id = self._device(request, "power_meter_ids")
+        return self._json(request, {"real_time": {
+            "value": self._power(device_id, self.now()),
+            "date": self.now().isoformat(timespec="seconds"),
+        }})
+
+    async def _powerstat_week(self, request: web.Request) -> web.Response:
+        """Return the energy of every day of the week of a date."""
+        device_id = self._device(request, "power_meter_ids")
+        date = self._date(request)
+        now = self.now()
+        monday = date - datetime.timedelta(days=date.weekday())
+        data = []
+        for week_day in range(7):
+            day = datetime.datetime.combine(
+                monday + datetime.timedelta(days=week_day), datetime.time())
+            if day.date() > now.date():
+                # Days still to come have no energy
+                data.append({"date": day.isoformat(), "kwh": None})
+                continue
+            minutes = 1440 if day.date() < now.date() else now.hour * 60 + now.minute
+            entry = {"date": day.isoformat(), "kwh": 0.0}
+            for hour in range(0, minutes, 60):
+                sample = self._energy(device_id, day + datetime.timedelta(minutes=hour),
+                                      min(60, minutes - hour))
+                entry = _add_entries(entry, sample)
+            data.append(entry)
+        return self._json(request, {"stat": {"period": "week", "data": data}})
+
+    async def _powerstat_day(self, request: web.Request) -> web.Response:
+        """Return the energy of the samples of a day so far."""
+        device_id = self._device(request, "power_meter_ids")
+        return self._json(request, {"stat": {"period": "day", "data": [
+            self._energy(device_id, moment, DAY_SAMPLE_MINUTES)
+            for moment in self._day_samples(self._date(request))
+        ]}})
+
+    def _day_samples(self, date: datetime.date) -> list[datetime.datetime]:
+        """Return the sample times of a day, up to the time of the stub."""
+        now = self.now()
+        start = datetime.datetime.combine(date, datetime.time())
+        samples = []
+        moment = start
+        while moment.date() == date and moment <= now:
+            samples.append(moment)
+            moment += datetime.timedelta(minutes=DAY_SAMPLE_MINUTES)
+        return samples
+
+    def _climate(self, request: web.Request, indoor: float, outdoor: float,
+                 amplitude: float) -> web.Response:
+        """Return the indoor and outdoor samples of a day so far."""
+        device_id = self._device(request, "temp_hum_ids")
+        data = []
+        for moment in self._day_samples(self._date(request)):
+            hour = moment.hour + moment.minute / 60
+            noise = self._noise(device_id, moment) - 0.5
+            wave = math.sin((hour - 9) * math.pi / 12)
+            data.append({
+                "date": moment.isoformat(),
+                "value": round(indoor + amplitude / 4 * wave + 0.4 * noise, 1),
+                "ext_value": round(outdoor + amplitude * wave + noise, 1),
+            })
+        return self._json(request, {"stat": {"period": "day", "data": data}})
+
+    async def _tempstat(self, request: web.Request) -> web.Response:
+        """Return the temperatures of a day so far."""
+        return self._climate(request, indoor=20.5, outdoor=11.0, amplitude=6.0)
+
+    async def _humstat(self, request: web.Request) -> web.Response:
+        """Return the humidities of a day so far."""
+        return self._climate(request, indoor=48.0, outdoor=72.0, amplitude=-12.0)
+
+    async def _set_faults(self, request: web.Request) -> web.Response:
+        """Set the injected faults."""
+        try:
+            self.faults.update(await request.json())
+        except ValueError as exception:
+            raise web.HTTPBadRequest(reason=str(exception)) from exception
+        return web.json_response(asdict(self.faults))
+
+    async def _stats(self, request: web.Request) -> web.Response:
+        """Return the number of requests served per endpoint."""
+        return web.json_response(self.requests)
+
+
+def _status(status: int) -> web.HTTPException:
+    """Return the HTTP error of a status."""
+    return {
+        401: web.HTTPUnauthorized,
+        403: web.HTTPForbidden,
+        503: web.HTTPServiceUnavailable,
+    }[status]()
+
+
+def _add_entries(total: dict, sample: dict) -> dict:
+    """Sum a power statistics sample into a total entry."""
+    total["kwh"] = round(total["kwh"] + sample["kwh"], 3)
+    if "kwh_prod" in sample:
+        total["kwh_prod"] = round(total.get("kwh_prod", 0) + sample["kwh_prod"], 3)
+    if "subconsumption" in sample:
+        labels = {sub["label"]: sub["kwh"] for sub in total.get("subconsumption", ())}
+        total["subconsumption"] = [
+            {"label": sub["label"], "kwh": round(labels.get(sub["label"], 0) + sub["kwh"], 3)}
+            for sub in sample["subconsumption"]
+        ]
+    return total
+
+
+def main() -> None:
+    """Run the stub until interrupted."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n", 1)[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--gateways", type=int, default=1)
+    parser.add_argument("--power-meters", type=int, default=1)
+    parser.add_argument("--temp-hums", type=int, default=1)
+    parser.add_argument("--tariff", choices=sorted(TARIFF_LABELS), default="tempo")
+    parser.add_argument("--production", action="store_true")
+    parser.add_argument("--etag", action="store_true")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--timeout", action="append", default=[], metavar="ENDPOINT")
+    parser.add_argument("--malformed", action="append", default=[], metavar="ENDPOINT")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--error-endpoint", action="append", default=[], metavar="ENDPOINT")
+    parser.add_argument("--day-offset", type=int, default=0)
+    args = parser.parse_args()
+    stub = EcojokoStub(
+        gateways=args.gateways,
+        power_meters=args.power_meters,
+        temp_hums=args.temp_hums,
+        tariff=args.tariff,
+        production=args.production,
+        etag=args.etag,
+        seed=args.seed,
+        faults=Faults(
+            latency=args.latency,
+            jitter=args.jitter,
+            timeout=args.timeout,
+            malformed=args.malformed,
+            error_rate=args.error_rate,
+            error_endpoints=args.error_endpoint,
+            day_offset=args.day_offset,
+        ),
+    )
+    web.run_app(stub.app, host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""Tests of the backfill of the power statistics into the long-term statistics."""
+from __future__ import annotations
+
+import asyncio
+from pathlib import Path
+import sys
+
+import aiohttp
+from aiohttp import web
+from homeassistant import loader
+from homeassistant.bootstrap import async_from_config_dict
+from homeassistant.components.recorder import get_instance
+from homeassistant.components.recorder.statistics import (
+    get_last_statistics,
+    list_statistic_ids,
+)
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import CONF_NAME, CONF_PASSWORD, CONF_USERNAME
+from homeassistant.core import HomeAssistant
+
+ROOT = Path(__file__).parents[1]
+sys.path[:0] = [str(ROOT), str(ROOT / "scripts")]
+
+from custom_components.little_monkey.api import LittleMonkeyApiClient  # noqa: E402
+from custom_components.little_monkey.backfill import LittleMonkeyBackfill  # noqa: E402
+from custom_components.little_monkey.const import DOMAIN  # noqa: E402
+from custom_components.little_monkey.store import async_get_store  # noqa: E402
+from ecojoko_stub import EcojokoStub  # noqa: E402
+
+
+async def _async_backfill(config_dir: Path) -> tuple[dict, list[dict], dict]:
+    """Backfill the stub into a real recorder, return what it stored."""
+    hass = HomeAssistant(str(config_dir))
+    loader.async_setup(hass)
+    await async_from_config_dict({
+        "homeassistant": {"time_zone": "Europe/Paris"},
+        "recorder": {"db_url": f"sqlite:///{config_dir / 'home-assistant_v2.db'}"},
+    }, hass)
+    await hass.async_start()
+    stub = EcojokoStub()
+    runner = web.AppRunner(stub.app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    base_url = f"http://127.0.0.1:{runner.addresses[0][1]}"
+    entry = ConfigEntry(
+        version=1, domain=DOMAIN, title="user@example.com", source="user",
+        data={CONF_NAME: "Maison", CONF_USERNAME: "user@example.com",
+              CONF_PASSWORD: "secret"})
+    try:
+        async with aiohttp.ClientSession() as session:
+            client = LittleMonkeyApiClient(
+                "user@example.com", "secret", 60, False, False, False, False,
+                session, base_url=base_url)
+            await client.async_get_realtime_data()
+            store = await async_get_store(hass)
+            backfill = LittleMonkeyBackfill(
+                hass, entry, client, store, {"grid_consumption": "Consommation"})
+            await backfill.async_run()
+            device_id = client.power_meter_ids[0]
+            checkpoint = store.get_backfill(client.store_key, device_id)
+            client.close()
+        recorder = get_instance(hass)
+        statistic_ids = await recorder.async_add_executor_job(
+            list_statistic_ids, hass, None, None)
+        last = await recorder.async_add_executor_job(
+            get_last_statistics, hass, 1,
+            f"{DOMAIN}:{device_id}_grid_consumption", False, {"sum"})
+    finally:
+        await runner.cleanup()
+        await hass.async_stop(force=True)
+    return checkpoint, statistic_ids, last
+
+
+def test_backfill_stores_statistics(tmp_path):
+    """The imported statistics exist once the checkpoint is saved."""
+    checkpoint, statistic_ids, last = asyncio.run(_async_backfill(tmp_path))
+    assert checkpoint is not None
+    statistics = {
+        statistic["statistic_id"]: statistic for statistic in statistic_ids
+        if statistic["source"] == DOMAIN
+    }
+    assert statistics
+    assert all(statistic["name"].startswith("Maison - ")
+               for statistic in statistics.values())
+    (rows,) = last.values()
+    assert rows[0]["sum"] == checkpoint["sums"]["grid_consumption"]